@@ -0,0 +1,65 @@
+import argparse
+import time
+
+import numpy as np
+
+from src.Simulation.backends import create_backend
+from src.Simulation.gmsh_reader import MeshData, read_mesh
+from src.Simulation.mesh import Mesh
+from src.Simulation.reorder import reorder_mesh
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Steps per second of the backends, with and without reordering.')
+    parser.add_argument('-m', '--mesh', default='bay.msh', help='Mesh file to benchmark')
+    parser.add_argument('-n', '--steps', type=int, default=500, help='Number of steps to time')
+    parser.add_argument('--backends', nargs='+', default=['numpy', 'sparse'],
+                        help='Backends to benchmark')
+    parser.add_argument('--shuffle', action='store_true',
+                        help='Shuffle the triangles first, like a mesh with poor locality')
+    return parser.parse_args()
+
+
+def shuffle_triangles(msh, seed=0):
+    """Return a copy of the mesh with the triangles in random order."""
+    cells = {}
+    for cell_type, cell_data in msh.cells_dict.items():
+        if cell_type == "triangle":
+            cell_data = cell_data[np.random.default_rng(seed).permutation(len(cell_data))]
+        cells[cell_type] = cell_data
+    return MeshData(msh.points, cells)
+
+
+def steps_per_second(msh, backend_name, n_steps):
+    """Time n_steps steps of one backend after a warm-up step."""
+    mesh = Mesh(msh)
+    mesh.compute_arrays()
+    backend = create_backend(backend_name, mesh, 1e-4)
+    state = mesh.state
+    backend.update(state)
+
+    start = time.perf_counter()
+    backend.advance(state, n_steps)
+    elapsed = time.perf_counter() - start
+    backend.close()
+    return n_steps / elapsed
+
+
+def main():
+    args = parse_arguments()
+    msh = read_mesh(args.mesh)
+    if args.shuffle:
+        msh = shuffle_triangles(msh)
+
+    orderings = {'original': msh}
+    for method in ['rcm', 'morton']:
+        orderings[method], _ = reorder_mesh(msh, method)
+
+    print(f"{'backend':<10}" + "".join(f"{name:>12}" for name in orderings))
+    for backend_name in args.backends:
+        rates = [steps_per_second(ordered, backend_name, args.steps) for ordered in orderings.values()]
+        print(f"{backend_name:<10}" + "".join(f"{rate:>12.0f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
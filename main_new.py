@@ -3,10 +3,8 @@
 import time
 import meshio
 import toml
-import matplotlib.pyplot as plt
 import numpy as np
 
-from matplotlib.tri import Triangulation
 from src.Simulation.cells import Triangle
 from src.Simulation.mesh import Mesh
 
@@ -1,14 +1,18 @@
 import os
 import time
-import meshio
+import traceback
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import toml
 import argparse
-import cv2
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.tri import Triangulation
-from src.Simulation.cells import Triangle
-from src.Simulation.mesh import Mesh
+from src.Simulation.backends import create_backend
+from src.Simulation.checkpoint import Checkpoint, load_checkpoint, mesh_hash, restart_step, save_checkpoint
+from src.Simulation.exposure import ARRIVAL_THRESHOLD, ExposureTracker
+from src.Simulation.mesh_cache import load_mesh
+from src.Simulation.rendering import FramePool
+from src.Simulation.snapshots import SnapshotWriter
+from src.Simulation.solver import MUSCL_CFL, plan_time_steps, report_time_steps, stable_delta_t
 
 def parse_arguments():
     """
@@ -26,6 +30,12 @@ def parse_arguments():
                        help='Process all TOML files in the specified folder')
     parser.add_argument('-c', '--config_file', default='input.toml',
                        help='Process a specific config file')
+    parser.add_argument('--threads', type=int, default=None,
+                       help='Number of threads for the threaded backend, overrides threads in the config')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                       help='Number of configuration files to run at the same time in separate processes')
+    parser.add_argument('--no-render', dest='render', action='store_false',
+                       help='Only compute and save the results, without plots or video')
     args = parser.parse_args()
     
     # If folder argument was provided, store the path, otherwise use default './'
@@ -74,56 +84,41 @@ def setup_output_directory(config_file):
     
     return results_dir, plots_dir
 
-def create_simulation_video(plots_dir, output_dir):
+def close_resources(resources, failed):
     """
-    Creates a video from the simulation plot images.
-    
+    Close every resource, also when closing one of them raises.
+
     Args:
-        plots_dir: Directory containing the plot images
-        output_dir: Directory where the video will be saved
+        resources: Objects with a close method, None entries are skipped
+        failed: True while another error is propagating. Errors from closing
+                are then only printed, so they do not replace that error.
     """
-    # Get all PNG files in the plots directory and sort them numerically
-    image_files = [f for f in os.listdir(plots_dir) if f.endswith('.png')]
-    image_files.sort(key=lambda x: int(x.split('_')[1].split('.')[0]))
-    
-    if not image_files:
-        print("No image files found for video creation")
-        return
-    
-    # Get the full path of the first image
-    first_image_path = os.path.join(plots_dir, image_files[0])
-    
-    # Read the first image to determine dimensions
-    frame = cv2.imread(first_image_path)
-    if frame is None:
-        print(f"Error reading image: {first_image_path}")
-        return
-        
-    height, width, layers = frame.shape
-    
-    # Create the output video file
-    video_path = os.path.join(output_dir, "simulation.mp4")
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    # Using 10 frames per second for a smooth visualization
-    video = cv2.VideoWriter(video_path, fourcc, 10, (width, height))
-    
-    # Write each image to the video
-    try:
-        for image_file in image_files:
-            image_path = os.path.join(plots_dir, image_file)
-            frame = cv2.imread(image_path)
-            if frame is not None:
-                video.write(frame)
-            else:
-                print(f"Error reading image: {image_path}")
-    finally:
-        # Ensure proper cleanup of resources
-        video.release()
-    
-    print(f"Video created successfully: {video_path}")
+    error = None
+    for resource in resources:
+        if resource is None:
+            continue
+        try:
+            resource.close()
+        except Exception as e:
+            if failed:
+                print(f"Error closing {type(resource).__name__} after a failed run: {type(e).__name__}: {e}")
+            elif error is None:
+                error = e
+    if error is not None:
+        raise error
 
-def run_simulation(config_path, output_dir):
-    """Run the oil distribution simulation with the specified configuration."""
+def run_simulation(config_path, output_dir, threads=None, render=True):
+    """
+    Run the oil distribution simulation with the specified configuration.
+
+    Args:
+        config_path: Path of the TOML configuration file
+        output_dir: Directory the plots, results and video are written to
+        threads: Number of threads from the command line. Selects the threaded
+                 backend unless the config chooses another one.
+        render: Plot the output steps and create the video. Without it the
+                plotting and video modules are never imported.
+    """
     # Load configuration
     config = toml.load(config_path)
     mshName = config["geometry"]["meshName"]
@@ -133,99 +128,249 @@ def run_simulation(config_path, output_dir):
     tStart = config["settings"]["tStart"]  # Start time
     tEnd = config["settings"]["tEnd"]   # End time
     writeFrequency = config["IO"]["writeFrequency"]  # Write frequency
+    restartFile = config["IO"].get("restartFile")  # Checkpoint to resume from
+    checkpointFrequency = config["IO"].get("checkpointFrequency")  # Steps between checkpoints, checked at output steps, the last step always writes one
+    write_snapshots = config["IO"].get("snapshots", True)  # Store the oil of every output step in snapshots.npy
+    renderWorkers = config["IO"].get("renderWorkers", 1)  # Processes plotting frames while the solver runs, 0 plots in between steps
+    writePlots = config["IO"].get("writePlots", True)  # Also write every frame as a PNG next to the video
+    rasterWidth = config["IO"].get("rasterWidth")  # Draw frames of this width without matplotlib
+    colorLimits = config["IO"].get("colorLimits")  # Oil amounts of the ends of the color scale, the same in every frame
+    threads = threads or config["settings"].get("threads")  # Threads for the threaded backend
+    processes = config["settings"].get("processes")  # Worker processes for the processes backend
+    reorder = config["settings"].get("reorder")  # "rcm" or "morton" to renumber the mesh
+    backend_name = config["settings"].get("backend", "threads" if threads else "numpy")  # Kernel used for the time steps
+    cfl = config["settings"].get("cfl", 1.0)  # Fraction of the largest stable time step
+    scheme = config["settings"].get("scheme", "upwind")  # "upwind" or second order "muscl"
+    x_star = config["geometry"].get("xStar")  # Center of the oil spill
+    borders = config["geometry"].get("borders")  # [[x min, x max], [y min, y max]] of the fish area
+    arrivalThreshold = config["geometry"].get("arrivalThreshold", ARRIVAL_THRESHOLD)  # Oil in the fish area that counts as arrived
+    ensemble = config.get("ensemble")  # Several spills stepped together, one per xStar
+    use_cache = config["settings"].get("meshCache", True)  # Reuse the preprocessed mesh between runs
     
     start_time = time.time()
     
-    # Create the mesh and compute neighbors
-    mesh = meshio.read(mshName)
-    mesh = Mesh(mesh)
-    final_cell_data, cell_type_mapping = mesh.main_function()
-    
-    # Initialize data structures
-    triangles = []
-    in_oil_amount = []
-    points = mesh._mesh.points
-    triangle_cell_indices = []
-    
-    # Process mesh data
-    for cell_type, cell_data in mesh._mesh.cells_dict.items():
-        for local_index, cell in enumerate(cell_data):
-            if len(cell) == 3:  # Only consider triangles
-                triangles.append(cell)
-                triangle_cell_indices.append(cell_type_mapping[(cell_type, local_index)])
-                in_oil_amount.append(final_cell_data[cell_type_mapping[(cell_type, local_index)]]['oil_amount'])
-    
-    # Convert to numpy arrays
-    triangles = np.array(triangles)
-    points = np.array(points)
-    in_oil_amount = np.array(in_oil_amount)
+    # Create the mesh and compute neighbors, or load both from the mesh cache.
+    # With reorder the triangles and points are renumbered for locality, outputs are mapped back below
+    mesh, reordering = load_mesh(mshName, x_star, reorder, cache=use_cache)
+    arrays = mesh.arrays
+    triangles = arrays.triangles
+    points = arrays.points
+    triangle_rows = arrays.triangle_cells
+    if reordering is not None:
+        # Plots and results use the original triangle order
+        triangles = reordering.original_triangles(triangles)
+        points = reordering.original_points(points)
+        triangle_rows = triangle_rows[reordering.triangle_inverse]
     
     # Calculate time step
     delta_t = (tEnd - tStart) / nSteps
+
+    # Resume from a checkpoint at tStart, or further into this run if it stopped there
+    checkpoint_hash = mesh_hash(arrays)
+    checkpoint_path = os.path.join(output_dir, "checkpoint.npz")
+    start_step = 0
+    restart = None
+    if restartFile and os.path.exists(restartFile):
+        restart = load_checkpoint(restartFile, checkpoint_hash)
+        start_step = restart_step(restart, tStart, delta_t, nSteps)
+        print(f"Restarting from {restartFile} at time {restart.time}, step {start_step}")
+    elif restartFile:
+        print(f"Restart file {restartFile} not found, starting from the initial oil")
+    last_checkpoint = start_step
+
+    # The largest stable step on this mesh decides how many solver steps are taken,
+    # merged steps also have to divide the steps left after a restart
+    max_delta_t = stable_delta_t(arrays, cfl * MUSCL_CFL if scheme == "muscl" else cfl)
+    merged, substeps = plan_time_steps(delta_t, max_delta_t, nSteps, writeFrequency, start_step)
+    report_time_steps(nSteps, delta_t, max_delta_t, merged, substeps, start_step)
+    solver_delta_t = delta_t * merged / substeps
+    solver_steps = 0
     
-    # Run simulation steps
-    for step in range(nSteps):
-        current_time = tStart + step * delta_t
-        updated_oil_amounts = []
-        
-        # Update oil amounts
-        for cell in mesh._cells:
-            if isinstance(cell, Triangle):
-                cell.oil_amount = cell.update_oil_amount()
-        
-        # Collect updated amounts
-        for cell_index in triangle_cell_indices:
-            updated_oil_amounts.append(mesh._cells[cell_index - 1].oil_amount)
-        
-        updated_oil_amounts = np.array(updated_oil_amounts)
+    # An ensemble keeps one column of oil per member in the state
+    member_dirs = [output_dir]
+    if ensemble:
+        mesh.ensemble_state(ensemble["xStar"], ensemble.get("amplitude"))
+        member_dirs = [os.path.join(output_dir, f"member_{member:02d}") for member in range(len(ensemble["xStar"]))]
+        for member_dir in member_dirs:
+            os.makedirs(os.path.join(member_dir, "plots"), exist_ok=True)
+
+    # Kernel for the time steps, fetch the state after it since the object backend replaces it
+    backend = create_backend(backend_name, mesh, solver_delta_t, threads=threads, processes=processes,
+                             scheme=scheme, ensemble=bool(ensemble))
+    # Close the backend, snapshots and frames even if a step fails, the processes
+    # backend holds workers and shared memory, the others a thread or processes
+    snapshots = None
+    frames = None
+    failed = True
+    try:
+        state = mesh.state
+        if restart is not None:
+            state.load(restart.oil)
+
+        # Oil in the fish area after every solver step
+        exposure = None
+        if borders:
+            exposure = ExposureTracker(arrays, borders, arrivalThreshold)
+            exposure.record(tStart + start_step * delta_t, state.current)
+
+        # Oil of every triangle at every output step and the last step, written in the background
+        snapshot_path = os.path.join(output_dir, "snapshots.npy")
+        if write_snapshots:
+            n_snapshots = len(range(start_step, nSteps, writeFrequency)) + 1
+            # After a restart the earlier snapshots of this output folder are kept
+            snapshots = SnapshotWriter(snapshot_path, n_snapshots, state.current[triangle_rows].shape,
+                                       keep_before=restart.time if restart is not None else None)
+
+        # Frames are plotted in the background from a copy of the oil. The oil never
+        # grows above its starting maximum, so by default the scale ends there
+        color_limits = colorLimits or (0.0, float(state.current[triangle_rows].max()))
+        if render:
+            frames = FramePool(points, triangles, renderWorkers, color_limits=color_limits, raster_width=rasterWidth)
+
+        # Output every writeFrequency configured steps, the solver steps in between
+        for step in range(start_step, nSteps, writeFrequency):
+            current_time = tStart + step * delta_t
+            # One column per member
+            updated_oil_amounts = state.current[triangle_rows].reshape(len(triangle_rows), -1)
+            if snapshots is not None:
+                snapshots.append(state.current[triangle_rows], step, current_time)
         
-        # Generate plots at intervals
-        if step % writeFrequency == 0:
-        #for step in range(0, nSteps, writeFrequency):
+            # Plot the oil of every member at the output time
             print(f"Config: {config_path}, Step {step}, Time: {current_time}")
-            
-            # Create visualization
-            triangulation = Triangulation(points[:, 0], points[:, 1], triangles)
-            plt.figure(figsize=(8, 6))
-            plt.tripcolor(triangulation, facecolors=updated_oil_amounts, 
-                         cmap="viridis", shading="flat")
-            plt.colorbar(label="Oil Amount")
-            plt.title(f"Oil Distribution at Step {step}")
-            plt.xlabel("X")
-            plt.ylabel("Y")
-            
-            # Save plot in configuration-specific directory
-            plot_filename = os.path.join(output_dir, "plots", f"step_{step:04d}.png")
-            plt.savefig(plot_filename)
-            plt.close()
+            if render:
+                for member, member_dir in enumerate(member_dirs):
+                    plot_filename = os.path.join(member_dir, "plots", f"step_{step:04d}.png") if writePlots else None
+                    video_path = os.path.join(member_dir, "simulation.mp4")
+                    frames.submit(updated_oil_amounts[:, member], step, plot_filename, video_path)
+
+            # Advance to the next output time
+            n_steps = min(writeFrequency, nSteps - step) * substeps // merged
+            if exposure is None:
+                backend.advance(state, n_steps)
+            else:
+                # One step at a time, so the oil in the fish area is known after every step
+                for substep in range(1, n_steps + 1):
+                    backend.update(state)
+                    exposure.record(current_time + substep * solver_delta_t, state.current)
+            solver_steps += n_steps
+
+            # Periodic checkpoint, written atomically so a crash keeps the previous one
+            reached = min(step + writeFrequency, nSteps)
+            if checkpointFrequency and reached - last_checkpoint >= checkpointFrequency and reached < nSteps:
+                save_checkpoint(checkpoint_path, Checkpoint(state.current, tStart + reached * delta_t, reached, checkpoint_hash))
+                last_checkpoint = reached
+
+        # The final state, a later run can continue from it to a later tEnd
+        save_checkpoint(checkpoint_path, Checkpoint(state.current, tStart + nSteps * delta_t, nSteps, checkpoint_hash))
+        updated_oil_amounts = state.current[triangle_rows].reshape(len(triangle_rows), -1)
+        if snapshots is not None:
+            snapshots.append(state.current[triangle_rows], nSteps, tStart + nSteps * delta_t)
+        failed = False
+    finally:
+        # Waits for the last frames and finishes the videos, raises if any frame failed
+        close_resources([snapshots, backend, frames], failed)
     
+    if exposure is not None:
+        # One column per member
+        exposure_oil = exposure.totals.reshape(len(exposure.times), -1)
+        first_arrival = np.atleast_1d(exposure.first_arrival())
+
     end_time = time.time()
     print(f"Simulation complete for {config_path}")
     print(f"Execution time: {end_time - start_time} seconds")
     
-    # Save final simulation data
-    simulation_data = {
-        'config_file': config_path,
-        'execution_time': end_time - start_time,
-        'final_oil_amounts': updated_oil_amounts.tolist(),
-        'mesh_name': mshName,
-        'simulation_parameters': {
-            'nSteps': nSteps,
-            'tStart': tStart,
-            'tEnd': tEnd,
-            'delta_t': delta_t
+    for member, member_dir in enumerate(member_dirs):
+        # Save final simulation data
+        simulation_data = {
+            'config_file': config_path,
+            'execution_time': end_time - start_time,
+            'final_oil_amounts': updated_oil_amounts[:, member].tolist(),
+            'mesh_name': mshName,
+            'checkpoint_file': checkpoint_path,
+            'simulation_parameters': {
+                'nSteps': nSteps,
+                'tStart': tStart,
+                'tEnd': tEnd,
+                'delta_t': delta_t,
+                'scheme': scheme,
+                'solver_delta_t': solver_delta_t,
+                'solver_steps': solver_steps
+            }
         }
-    }
-    
-    # Save simulation results
-    results_file = os.path.join(output_dir, "simulation_results.toml")
-    with open(results_file, 'w') as f:
-        toml.dump(simulation_data, f)
+        if snapshots is not None:
+            simulation_data['snapshot_file'] = snapshot_path
+        if exposure is not None:
+            simulation_data['exposure'] = {
+                'borders': borders,
+                'cells': len(exposure.cells),
+                'threshold': arrivalThreshold,
+                'max_oil': float(exposure_oil[:, member].max()),
+                'times': exposure.times.tolist(),
+                'oil': exposure_oil[:, member].tolist(),
+            }
+            # Left out if the oil never reached the fish area
+            if np.isfinite(first_arrival[member]):
+                simulation_data['exposure']['first_arrival'] = float(first_arrival[member])
+        if restart is not None:
+            simulation_data['restart'] = {
+                'file': restartFile,
+                'time': restart.time,
+                'step': start_step,
+            }
+        if ensemble:
+            simulation_data['member'] = {
+                'xStar': list(ensemble["xStar"][member]),
+                'amplitude': ensemble.get("amplitude", [1.0] * len(member_dirs))[member],
+            }
 
-    # Create  video file
-    plots_dir = os.path.join(output_dir, "plots")
-    print("Creating video file... ")
-    create_simulation_video(plots_dir, output_dir)
+        # Save simulation results
+        results_file = os.path.join(member_dir, "simulation_results.toml")
+        with open(results_file, 'w') as f:
+            toml.dump(simulation_data, f)
+
+def run_logged(config_path, output_dir, threads=None, render=True):
+    """
+    Run one configuration with everything it prints written to its own log
+    file, named by logName in the [IO] section, in the output directory.
+
+    Args:
+        config_path: Path of the TOML configuration file
+        output_dir: Directory the plots, results, video and log are written to
+        threads: Number of threads from the command line
+        render: Plot the output steps and create the video
+    Returns:
+        (execution time in seconds, error message or None)
+    """
+    start_time = time.time()
+    try:
+        log_name = toml.load(config_path).get("IO", {}).get("logName", "log")
+    except Exception:
+        log_name = "log"
+    log_path = os.path.join(output_dir, f"{log_name}.log")
+
+    error = None
+    with open(log_path, 'w') as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            run_simulation(config_path, output_dir, threads, render)
+        except Exception as e:
+            traceback.print_exc()
+            error = f"{type(e).__name__}: {e}"
+    return time.time() - start_time, error
+
+def print_summary(summary):
+    """
+    Print the execution time and outcome of every configuration file.
+
+    Args:
+        summary: List of (config file, execution time in seconds, error message or None)
+    """
+    width = max([len("Config")] + [len(config_file) for config_file, _, _ in summary])
+    print(f"\n{'Config':<{width}}  {'Time [s]':>9}  Status")
+    for config_file, execution_time, error in summary:
+        status = "ok" if error is None else f"failed: {error}"
+        print(f"{config_file:<{width}}  {execution_time:>9.2f}  {status}")
+    failed = sum(error is not None for _, _, error in summary)
+    print(f"{len(summary) - failed} succeeded, {failed} failed")
 
 def main():
     """
@@ -261,7 +406,8 @@ def main():
     for cfg in config_files:
         print(f"  - {cfg}")
     
-    # Process each configuration file
+    # Collect the configuration files that exist, with their output directories
+    runs = []
     for config_file in config_files:
         config_path = os.path.join(search_dir, config_file)
         if not os.path.exists(config_path):
@@ -270,15 +416,41 @@ def main():
             
         # Setup output directory for this configuration
         results_dir, plots_dir = setup_output_directory(config_file)
-        print(f"\nProcessing configuration: {config_file}")
-        print(f"Results will be saved to: {results_dir}")
-        
-        # Run simulation with this configuration
-        try:
-            run_simulation(config_path, results_dir)
-        except Exception as e:
-            print(f"Error processing {config_file}: {str(e)}")
-            print("Continuing with next configuration file...")
+        runs.append((config_file, config_path, results_dir))
+
+    summary = []
+    if args.jobs > 1 and len(runs) > 1:
+        # Run the configurations in a bounded pool, each one logs to its own file
+        print(f"\nRunning {len(runs)} configurations with {min(args.jobs, len(runs))} parallel jobs")
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(runs))) as pool:
+            futures = {pool.submit(run_logged, config_path, results_dir, args.threads, args.render): (config_file, results_dir)
+                       for config_file, config_path, results_dir in runs}
+            for future in as_completed(futures):
+                config_file, results_dir = futures[future]
+                try:
+                    execution_time, error = future.result()
+                except Exception as e:  # The worker process itself died
+                    execution_time, error = 0.0, f"{type(e).__name__}: {e}"
+                print(f"Finished {config_file}, results in {results_dir}")
+                summary.append((config_file, execution_time, error))
+    else:
+        # Process each configuration file
+        for config_file, config_path, results_dir in runs:
+            print(f"\nProcessing configuration: {config_file}")
+            print(f"Results will be saved to: {results_dir}")
+            
+            # Run simulation with this configuration
+            start_time = time.time()
+            error = None
+            try:
+                run_simulation(config_path, results_dir, args.threads, args.render)
+            except Exception as e:
+                print(f"Error processing {config_file}: {str(e)}")
+                print("Continuing with next configuration file...")
+                error = f"{type(e).__name__}: {e}"
+            summary.append((config_file, time.time() - start_time, error))
+
+    print_summary(summary)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
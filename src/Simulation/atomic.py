@@ -0,0 +1,22 @@
+import os
+
+
+def write_atomic(path, write):
+    """
+    Write a file under a temporary name, flush it to disk and rename it, so
+    readers and later runs only ever see the old or the complete new file,
+    also after a crash.
+    :param path: File to write, its folder is created if needed
+    :param write: Function called with the open binary temporary file
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
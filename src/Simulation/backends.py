@@ -0,0 +1,281 @@
+import importlib.util
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.Simulation.cells import Triangle
+from src.Simulation.decomposition import DomainDecomposition
+from src.Simulation.solver import MusclSolver, UpwindSolver
+
+# Numba is optional, the numba backend falls back to numpy without it. It is
+# slow to import, so it is only imported when the numba backend is created.
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+
+class Backend(ABC):
+    def __init__(self, mesh, delta_t=0.01) -> None:
+        """
+        Kernel that advances the shared OilState of a mesh one time step.
+        Every backend reads mesh.state and mesh.arrays, so they can be swapped
+        without touching the time loop.
+        :param mesh: Mesh where compute_arrays or main_function has been called
+        :param delta_t: Time step
+        """
+        self._mesh = mesh
+        self._delta_t = delta_t
+
+    @abstractmethod
+    def update(self, state):
+        """
+        Read state.current, write state.next and swap the buffers
+        """
+
+    def advance(self, state, n_steps):
+        """
+        Take n_steps steps, backends that can batch steps override this
+        """
+        for _ in range(n_steps):
+            self.update(state)
+
+    def close(self):
+        """
+        Release resources held by the backend, called after the last step
+        """
+
+
+class ObjectBackend(Backend):
+    def __init__(self, mesh, delta_t=0.01) -> None:
+        """
+        Reference backend calling Triangle.update_oil_amount on every cell.
+        Creates the cell objects, which replaces mesh.state with the one the cells read.
+        """
+        super().__init__(mesh, delta_t)
+        mesh.main_function(delta_t)
+        self._triangles = [cell for cell in mesh._cells if isinstance(cell, Triangle)]
+
+    def update(self, state):
+        for cell in self._triangles:
+            cell.update_oil_amount()
+        state.swap()
+
+
+class NumpyBackend(Backend):
+    def __init__(self, mesh, delta_t=0.01) -> None:
+        """
+        Vectorized face arrays of UpwindSolver
+        """
+        super().__init__(mesh, delta_t)
+        self._solver = UpwindSolver(mesh.arrays, delta_t)
+
+    def update(self, state):
+        self._solver.update(state)
+
+
+class SparseBackend(Backend):
+    def __init__(self, mesh, delta_t=0.01) -> None:
+        """
+        One sparse matrix-vector product per step with the assembled operator
+        """
+        super().__init__(mesh, delta_t)
+        self._solver = UpwindSolver(mesh.arrays, delta_t, sparse=True)
+
+    def update(self, state):
+        self._solver.update(state)
+
+
+class MusclBackend(Backend):
+    def __init__(self, mesh, delta_t=0.01) -> None:
+        """
+        Second order MUSCL scheme with SSP Runge-Kutta, see MusclSolver
+        """
+        super().__init__(mesh, delta_t)
+        self._solver = MusclSolver(mesh.arrays, delta_t)
+
+    def update(self, state):
+        self._solver.update(state)
+
+
+def upwind_kernel(oil, out, owner, neighbor, coefficient, dt_over_area):
+    """
+    Loop version of UpwindSolver.step, compiled by the numba backend
+    """
+    total_flux = np.zeros_like(oil)
+    for face in range(len(owner)):
+        if coefficient[face] > 0:
+            face_flux = coefficient[face] * oil[owner[face]]
+        else:
+            face_flux = coefficient[face] * oil[neighbor[face]]
+        total_flux[owner[face]] += face_flux
+        total_flux[neighbor[face]] -= face_flux
+
+    for cell in range(len(oil)):
+        out[cell] = oil[cell] - dt_over_area[cell] * total_flux[cell]
+
+
+class NumbaBackend(Backend):
+    def __init__(self, mesh, delta_t=0.01) -> None:
+        """
+        upwind_kernel compiled with Numba over the face arrays of UpwindSolver
+        """
+        super().__init__(mesh, delta_t)
+        self._solver = UpwindSolver(mesh.arrays, delta_t)
+        import numba
+        self._kernel = numba.njit(upwind_kernel)
+
+    def update(self, state):
+        solver = self._solver
+        self._kernel(state.current, state.next, solver.owner, solver.neighbor,
+                     solver.flux_coefficient, solver.dt_over_area)
+        state.swap()
+
+
+class ThreadedBackend(Backend):
+    def __init__(self, mesh, delta_t=0.01, threads=None) -> None:
+        """
+        Splits the triangles into contiguous chunks that are updated in a
+        thread pool. Each chunk sums the fluxes of the faces touching its cells
+        with np.bincount in the face order of UpwindSolver, so the result is
+        bit-identical to the numpy backend for any number of threads.
+        :param threads: Number of threads, defaults to the number of CPUs
+        """
+        super().__init__(mesh, delta_t)
+        arrays = mesh.arrays
+        self._threads = threads or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=self._threads)
+
+        triangle_cells = arrays.triangle_cells
+        if len(triangle_cells) and not np.array_equal(triangle_cells, np.arange(triangle_cells[0], triangle_cells[-1] + 1)):
+            raise ValueError("The threaded backend needs the triangles to be numbered contiguously")
+        first = int(triangle_cells[0]) if len(triangle_cells) else 0
+
+        solver = UpwindSolver(arrays, delta_t)
+        owner, neighbor = solver.owner, solver.neighbor
+
+        # Chunk boundaries in cell index, every chunk is a slice of the state
+        bounds = first + np.linspace(0, len(triangle_cells), self._threads + 1).astype(int)
+        self._chunks = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if stop == start:
+                continue
+            owned = (owner >= start) & (owner < stop)
+            adjacent = (neighbor >= start) & (neighbor < stop)
+            faces = np.flatnonzero(owned | adjacent)
+            # Sides outside the chunk go to an extra bin that is dropped
+            n_cells = stop - start
+            self._chunks.append((
+                slice(start, stop),
+                owner[faces],
+                neighbor[faces],
+                solver.flux_coefficient[faces],
+                np.where(owned[faces], owner[faces] - start, n_cells),
+                np.where(adjacent[faces], neighbor[faces] - start, n_cells),
+                solver.dt_over_area[start:stop],
+            ))
+
+    def update_chunk(self, chunk, oil, out):
+        """
+        Update the cells of one chunk with the same operations as UpwindSolver.step
+        """
+        cells, owner, neighbor, coefficient, owner_bin, neighbor_bin, dt_over_area = chunk
+        n_cells = len(dt_over_area)
+        upwind_oil = np.where(coefficient > 0, oil[owner], oil[neighbor])
+        face_flux = coefficient * upwind_oil
+        total_flux = np.bincount(owner_bin, face_flux, n_cells + 1)[:n_cells]
+        total_flux -= np.bincount(neighbor_bin, face_flux, n_cells + 1)[:n_cells]
+        np.subtract(oil[cells], dt_over_area * total_flux, out=out[cells])
+
+    def update(self, state):
+        if len(self._chunks) == 1:
+            # Nothing to overlap, skip the hand-off to the pool
+            self.update_chunk(self._chunks[0], state.current, state.next)
+            state.swap()
+            return
+        # Waiting for every chunk is the barrier between steps
+        futures = [self._pool.submit(self.update_chunk, chunk, state.current, state.next) for chunk in self._chunks]
+        for future in futures:
+            future.result()
+        state.swap()
+
+    def close(self):
+        self._pool.shutdown()
+
+class ProcessBackend(Backend):
+    def __init__(self, mesh, delta_t=0.01, processes=None) -> None:
+        """
+        Domain decomposition over worker processes that exchange halo cells
+        through shared memory, see DomainDecomposition.
+        :param processes: Number of worker processes, defaults to the number of CPUs
+        """
+        super().__init__(mesh, delta_t)
+        self._decomposition = DomainDecomposition(mesh.arrays, delta_t, processes or os.cpu_count() or 1)
+
+    def update(self, state):
+        self.advance(state, 1)
+
+    def advance(self, state, n_steps):
+        # The workers only gather into the global ordering once per call
+        state.next[:] = self._decomposition.advance(state.current, n_steps)
+        state.swap()
+
+    def close(self):
+        self._decomposition.close()
+
+
+class BackendFactory:
+    def __init__(self) -> None:
+        self._backends = {}
+
+    def register(self, key: str, name: object):
+        if key not in self._backends:
+            self._backends[key] = name
+
+    @property
+    def keys(self):
+        return list(self._backends)
+
+    def __call__(self, key: str, mesh, delta_t=0.01, **options):
+        if key not in self._backends:
+            raise ValueError(f"Unknown backend '{key}', choose one of {self.keys}")
+        return self._backends[key](mesh, delta_t, **options)
+
+
+def create_backend(key, mesh, delta_t=0.01, threads=None, processes=None, scheme="upwind", ensemble=False):
+    """
+    Create the backend selected with backend = "..." in the [settings] section.
+    The numba backend is replaced by the numpy backend when Numba is not installed.
+    :param threads: Number of threads for the threads backend
+    :param processes: Number of worker processes for the processes backend
+    :param scheme: "upwind" or "muscl", the muscl scheme has its own NumPy backend
+    :param ensemble: mesh.state holds one column per member, see Mesh.ensemble_state.
+                     Upwind ensembles are stepped with the sparse operator.
+    """
+    bf = BackendFactory()
+    bf.register("object", ObjectBackend)
+    bf.register("numpy", NumpyBackend)
+    bf.register("sparse", SparseBackend)
+    bf.register("numba", NumbaBackend)
+    bf.register("threads", ThreadedBackend)
+    bf.register("processes", ProcessBackend)
+    bf.register("muscl", MusclBackend)
+
+    if scheme == "muscl":
+        if key not in ("numpy", "muscl"):
+            print(f"The muscl scheme is not available for the {key} backend, using the numpy version")
+        key = "muscl"
+    elif scheme != "upwind":
+        raise ValueError(f"Unknown scheme '{scheme}', choose 'upwind' or 'muscl'")
+    elif ensemble and key != "sparse":
+        # One sparse matrix times the (cells, members) state steps every member in one pass
+        print(f"Ensembles are not available for the {key} backend, using the sparse backend")
+        key = "sparse"
+
+    if key == "numba" and not HAS_NUMBA:
+        print("Numba is not installed, using the numpy backend")
+        key = "numpy"
+    if key == "threads":
+        return bf(key, mesh, delta_t, threads=threads)
+    if key == "processes":
+        return bf(key, mesh, delta_t, processes=processes)
+    return bf(key, mesh, delta_t)
@@ -3,21 +3,22 @@ import numpy as np
 
 
 class Cell(ABC):
-    def __init__(self, id, oil_amount, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t) -> None:
+    def __init__(self, id, state, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t, face_table) -> None:
         super().__init__()
         self._id = id
-        self._oil_amount = oil_amount
+        self._state = state  # Shared OilState, the oil of this cell is state.current[id - 1]
         self._area = area
         self._normal_vectors_with_faces = normal_vectors_with_faces
         self._faces = faces
         self._neighbors = neighbors
         self._velocity_field = velocity_field
         self._delta_t = delta_t
+        self._face_table = face_table  # (neighbor id, scaled normal, face velocity coefficient) per face
 
 
 class Vertex(Cell):
-    def __init__(self, id, oil_amount, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t) -> None:
-        super().__init__(id, oil_amount, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t)
+    def __init__(self, id, state, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t, face_table) -> None:
+        super().__init__(id, state, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t, face_table)
 
     @property
     def id(self):
@@ -25,8 +26,8 @@ class Vertex(Cell):
 
 
 class Line(Cell):
-    def __init__(self, id, oil_amount, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t) -> None:
-        super().__init__(id, oil_amount, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t)
+    def __init__(self, id, state, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t, face_table) -> None:
+        super().__init__(id, state, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t, face_table)
 
     @property
     def id(self):
@@ -34,8 +35,8 @@ class Line(Cell):
 
 
 class Triangle(Cell):
-    def __init__(self, id, oil_amount, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t) -> None:
-        super().__init__(id, oil_amount, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t)
+    def __init__(self, id, state, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t, face_table) -> None:
+        super().__init__(id, state, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t, face_table)
 
     @property
     def id(self):
@@ -43,7 +44,7 @@ class Triangle(Cell):
 
     @property
     def oil_amount(self):
-        return self._oil_amount
+        return self._state.current[self._id - 1]
 
     @property
     def faces(self):
@@ -55,43 +56,26 @@ class Triangle(Cell):
 
     @oil_amount.setter
     def oil_amount(self, value):
-        self._oil_amount = value
+        self._state.current[self._id - 1] = value
     
     def update_oil_amount(self):
+        """
+        Compute the oil amount of the next step from the current buffer of the
+        shared state and store it in the next buffer, so the order cells are
+        updated in does not matter. The caller swaps the state after all cells.
+        """
+        oil = self._state.current
+        u_i = oil[self._id - 1]
         total_flux = 0  # Initialize the total flux for the current cell
 
-        for face, normal in self._normal_vectors_with_faces:
-            for ngh in self._neighbors:
-            # Find the matching face and normal vector for the neighbor
-                # Normalize and sort both face representations
-                face_normalized = sorted(map(int, face))  # Convert face to sorted list of integers
-
-                # print(self._id, face, normal)
-                # Flatten ngh['neighbor_faces'] if it contains tuples
-                neighbor_face_flattened = [int(vertex) for pair in ngh['neighbor_faces'] for vertex in pair]
-                neighbor_face_normalized = sorted(neighbor_face_flattened)  # Normalize neighbor faces
-                
-                if face_normalized == neighbor_face_normalized:  # Match the shared face
-                    # Average velocity across the interface
-                    v_avg = 0.5 * (self._velocity_field + ngh['neighbor_velocity_field'])
-
-                    # print(f"{self._id}, Ui face: {face_normalized}, Neihgbor face: {neighbor_face_normalized}")
-                    # print(f"{self._id}, Ui velocity: {self._velocity_field}, Niehgbor velocity: {ngh['neighbor_velocity_field']}")
-                    # print(f"{self._id}, Average velocity: {v_avg}, Normal vector: {normal}")
-
-                    # Compute flux across the interface
-                    flux_contribution = self.flux(
-                        self._oil_amount, 
-                        ngh['neighbor_oil_amount'], 
-                        normal, 
-                        v_avg
-                    )
-
-                    # Accumulate the flux contribution
-                    total_flux += flux_contribution
-
-        # Update the oil amount using the property setter
-        return self._oil_amount - (self._delta_t / self._area) * total_flux
+        # The faces were matched to neighbors when the mesh was set up
+        for neighbor_id, _, coefficient in self._face_table:
+            total_flux += self.upwind_flux(u_i, oil[neighbor_id - 1], coefficient)
+
+        # Write the new oil amount to the next buffer
+        new_oil_amount = u_i - (self._delta_t / self._area) * total_flux
+        self._state.next[self._id - 1] = new_oil_amount
+        return new_oil_amount
 
     def flux(self, u_i, u_ngh, nu, v):
         """
@@ -106,8 +90,22 @@ class Triangle(Cell):
         else:
             return u_ngh * np.dot(v, nu)
 
+    def upwind_flux(self, u_i, u_ngh, coefficient):
+        """
+        Same as flux, with the average velocity already dotted with the normal.
+        coefficient: Face velocity coefficient from the face table.
+        """
+        if coefficient > 0:
+            return u_i * coefficient
+        else:
+            return u_ngh * coefficient
+
+    @property
+    def face_table(self):
+        return self._face_table
+
     def __str__(self) -> str:
         return (
-            f"ID: {self._id}, Oil: {self._oil_amount}, Area: {self._area}, "
+            f"ID: {self._id}, Oil: {self.oil_amount}, Area: {self._area}, "
             f"Faces: {self._faces}, Velocity: {self._velocity_field}, Neighbors: {self._neighbors}"
         )
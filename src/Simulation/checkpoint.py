@@ -0,0 +1,90 @@
+import hashlib
+
+import numpy as np
+
+from src.Simulation.atomic import write_atomic
+
+# Bump when the layout of the checkpoint files changes
+CHECKPOINT_VERSION = 1
+
+# Relative difference between the checkpoint time and an output time that still counts as the same time
+TIME_TOLERANCE = 1e-9
+
+
+class Checkpoint:
+    def __init__(self, oil, time, step, mesh_hash) -> None:
+        """
+        State of a run at one output time.
+        :param oil: Oil of every cell in solver order, (number of cells, number of members) for an ensemble
+        :param time: Simulation time of the oil
+        :param step: Configured steps taken since tStart of the run that wrote it
+        :param mesh_hash: mesh_hash of the arrays the oil belongs to
+        """
+        self._oil = oil
+        self._time = time
+        self._step = step
+        self._mesh_hash = mesh_hash
+
+    @property
+    def oil(self):
+        return self._oil
+
+    @property
+    def time(self):
+        return self._time
+
+    @property
+    def step(self):
+        return self._step
+
+    @property
+    def mesh_hash(self):
+        return self._mesh_hash
+
+
+def mesh_hash(arrays):
+    """
+    Hash of the points, triangles and cell centroids in solver order, so a
+    checkpoint is only loaded into the same mesh with the same reordering
+    """
+    digest = hashlib.sha256()
+    for array in [arrays.points, arrays.triangles, arrays.centroids]:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def save_checkpoint(path, checkpoint):
+    """
+    Write a checkpoint to a binary .npz file with write_atomic, so a crash
+    while writing leaves the previous checkpoint intact.
+    """
+    write_atomic(path, lambda f: np.savez(f, version=CHECKPOINT_VERSION, oil=checkpoint.oil, time=checkpoint.time,
+                                          step=checkpoint.step, mesh_hash=checkpoint.mesh_hash))
+
+
+def load_checkpoint(path, expected_hash=None):
+    """
+    Read a checkpoint written by save_checkpoint
+    :param expected_hash: mesh_hash of the mesh the oil will be loaded into, checked if given
+    :return: Checkpoint
+    """
+    with np.load(path) as content:
+        if int(content["version"]) != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} has checkpoint version {int(content['version'])}, expected {CHECKPOINT_VERSION}")
+        checkpoint = Checkpoint(content["oil"], float(content["time"]), int(content["step"]), str(content["mesh_hash"]))
+    if expected_hash is not None and checkpoint.mesh_hash != expected_hash:
+        raise ValueError(f"{path} was written for another mesh or cell ordering")
+    return checkpoint
+
+
+def restart_step(checkpoint, t_start, delta_t, n_steps):
+    """
+    Configured step of a run from t_start with steps of delta_t that the checkpoint time falls on.
+    0 resumes at t_start, a later step continues a run that stopped there.
+    """
+    step = round((checkpoint.time - t_start) / delta_t)
+    tolerance = TIME_TOLERANCE * max(1.0, abs(checkpoint.time))
+    if not 0 <= step <= n_steps or abs(t_start + step * delta_t - checkpoint.time) > tolerance:
+        raise ValueError(f"Checkpoint time {checkpoint.time} is not a step of the run from {t_start} "
+                         f"with {n_steps} steps of {delta_t}")
+    return step
@@ -0,0 +1,110 @@
+import numpy as np
+
+# Edges of a triangle in the same order as Mesh.find_faces
+TRIANGLE_EDGES = [[0, 1], [1, 2], [0, 2]]
+
+
+def cell_edges(cell_data):
+    """
+    Edge keys of a block of cells as sorted point index pairs.
+    :param cell_data: (number of cells, 2) lines or (number of cells, 3) triangles
+    :return: (number of cells, edges per cell, 2) array, edges per cell is 0 for other cells
+    """
+    cell_data = np.asarray(cell_data)
+    if cell_data.ndim != 2 or cell_data.shape[1] not in (2, 3):
+        return np.empty((len(cell_data), 0, 2), dtype=np.int64)
+    if cell_data.shape[1] == 2:
+        return np.sort(cell_data, axis=1)[:, None, :]
+    return np.sort(cell_data[:, TRIANGLE_EDGES], axis=2)
+
+
+class EdgeConnectivity:
+    def __init__(self, face_keys, face_cells, n_cells) -> None:
+        """
+        Find the cells sharing each edge with one sort over the edge keys.
+        An edge belonging to exactly two cells connects them, an edge belonging
+        to one cell lies on the boundary.
+        :param face_keys: (number of faces, 2) sorted point indices of every face
+        :param face_cells: Cell index of every face, in non-decreasing order
+        :param n_cells: Number of cells
+        """
+        face_keys = np.asarray(face_keys, dtype=np.int64).reshape(-1, 2)
+        face_cells = np.asarray(face_cells, dtype=np.int64)
+        n_faces = len(face_cells)
+
+        # One integer per edge, so a single sort groups equal edges
+        n_points = int(face_keys.max()) + 1 if n_faces else 0
+        keys = face_keys[:, 0] * n_points + face_keys[:, 1]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+
+        # Length of the run of equal keys every sorted face belongs to
+        run_starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        run_lengths = np.diff(np.r_[run_starts, n_faces])
+        pairs = run_starts[run_lengths == 2]
+
+        # Faces i and j in each row are the two sides of the same edge
+        self._interior_faces = np.stack([order[pairs], order[pairs + 1]], axis=1)
+        self._boundary_faces = np.sort(order[run_starts[run_lengths == 1]])
+
+        self._face_neighbors = np.full(n_faces, -1, dtype=np.int64)
+        self._face_neighbors[self._interior_faces[:, 0]] = face_cells[self._interior_faces[:, 1]]
+        self._face_neighbors[self._interior_faces[:, 1]] = face_cells[self._interior_faces[:, 0]]
+
+        self._interior_edges = face_cells[self._interior_faces]
+        self._boundary_edges = face_keys[self._boundary_faces]
+        self._boundary_cells = face_cells[self._boundary_faces]
+
+        shared = self._face_neighbors >= 0
+        self._neighbor_ptr = np.concatenate([[0], np.cumsum(np.bincount(face_cells[shared], minlength=n_cells))])
+        self._neighbor_index = self._face_neighbors[shared]
+
+    @property
+    def face_neighbors(self):
+        """
+        Cell on the other side of every face, -1 if the face is not shared by exactly two cells
+        """
+        return self._face_neighbors
+
+    @property
+    def interior_faces(self):
+        """
+        (number of interior edges, 2) indices of the two faces of every interior edge
+        """
+        return self._interior_faces
+
+    @property
+    def interior_edges(self):
+        """
+        (number of interior edges, 2) the two cells sharing every interior edge
+        """
+        return self._interior_edges
+
+    @property
+    def boundary_faces(self):
+        return self._boundary_faces
+
+    @property
+    def boundary_edges(self):
+        """
+        (number of boundary edges, 2) point indices of every edge with one cell
+        """
+        return self._boundary_edges
+
+    @property
+    def boundary_cells(self):
+        return self._boundary_cells
+
+    @property
+    def neighbor_ptr(self):
+        """
+        CSR row pointer, the neighbors of cell i are neighbor_index[neighbor_ptr[i]:neighbor_ptr[i + 1]]
+        """
+        return self._neighbor_ptr
+
+    @property
+    def neighbor_index(self):
+        return self._neighbor_index
+
+    def neighbors(self, cell):
+        return self._neighbor_index[self._neighbor_ptr[cell]:self._neighbor_ptr[cell + 1]]
@@ -0,0 +1,209 @@
+import multiprocessing
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def recursive_coordinate_bisection(centroids, n_parts):
+    """
+    Split cells into n_parts subdomains of (almost) equal size by cutting
+    along the longest side of the bounding box at the median, recursively.
+    :param centroids: (number of cells, 2) midpoints of the cells to split
+    :param n_parts: Number of subdomains
+    :return: Subdomain of every cell, from 0 to n_parts - 1
+    """
+    parts = np.zeros(len(centroids), dtype=np.int64)
+
+    def split(index, first_part, n):
+        if n == 1 or len(index) == 0:
+            parts[index] = first_part
+            return
+        coordinates = centroids[index]
+        axis = np.argmax(coordinates.max(axis=0) - coordinates.min(axis=0))
+        order = index[np.argsort(coordinates[:, axis], kind="stable")]
+        n_left = n // 2
+        cut = len(order) * n_left // n
+        split(order[:cut], first_part, n_left)
+        split(order[cut:], first_part + n_left, n - n_left)
+
+    split(np.arange(len(centroids)), 0, n_parts)
+    return parts
+
+
+class Subdomain:
+    def __init__(self, arrays, cells, parts, part, delta_t) -> None:
+        """
+        Local copy of the faces of one subdomain. Local cells are the owned
+        triangles followed by the halo: neighbors owned by other subdomains
+        and the cells that are never updated.
+        :param arrays: MeshArrays of the whole mesh
+        :param cells: Cell index of every triangle that parts refers to
+        :param parts: Subdomain of every triangle
+        :param part: Subdomain this object describes
+        :param delta_t: Time step
+        """
+        owned = cells[parts == part]
+        ptr = arrays.neighbor_ptr
+        counts = np.diff(ptr)[owned]
+        # CSR face indices of the owned cells
+        faces = np.repeat(ptr[owned], counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        neighbors = arrays.neighbor_index[faces].astype(np.int64)
+        halo = np.setdiff1d(np.unique(neighbors), owned)
+
+        self._owned = owned
+        self._halo = halo
+
+        # Local index: owned cells first, then the halo, both sorted
+        is_owned = np.isin(neighbors, owned)
+        self._face_cell = np.repeat(np.arange(len(owned)), counts)
+        self._face_neighbor = np.where(is_owned, np.searchsorted(owned, neighbors),
+                                       len(owned) + np.searchsorted(halo, neighbors))
+        self._coefficient = arrays.face_coefficients[faces]
+        self._dt_over_area = delta_t / arrays.areas[owned]
+
+        # Owned cells that are in the halo of another subdomain
+        triangle_part = np.full(arrays.n_cells, -1)
+        triangle_part[cells] = parts
+        outside = triangle_part[neighbors] != part
+        self._send = np.unique(np.repeat(owned, counts)[outside & (triangle_part[neighbors] >= 0)])
+        # Only halo cells owned by another subdomain change between steps
+        self._receive = halo[triangle_part[halo] >= 0]
+        self._receive_local = len(owned) + np.searchsorted(halo, self._receive)
+        self._send_local = np.searchsorted(owned, self._send)
+
+    @property
+    def owned(self):
+        return self._owned
+
+    @property
+    def halo(self):
+        return self._halo
+
+    @property
+    def send(self):
+        """
+        Cell index of the owned cells other subdomains read
+        """
+        return self._send
+
+    @property
+    def send_local(self):
+        return self._send_local
+
+    @property
+    def receive(self):
+        """
+        Cell index of the halo cells owned by other subdomains
+        """
+        return self._receive
+
+    @property
+    def receive_local(self):
+        return self._receive_local
+
+    def step(self, oil):
+        """
+        One upwind step of the owned cells, oil holds owned and halo cells
+        :return: New oil amounts of the owned cells
+        """
+        n_owned = len(self._owned)
+        upwind_oil = np.where(self._coefficient > 0, oil[self._face_cell], oil[self._face_neighbor])
+        total_flux = np.bincount(self._face_cell, self._coefficient * upwind_oil, n_owned)
+        return oil[:n_owned] - self._dt_over_area * total_flux
+
+
+def _worker(subdomain, names, n_cells, barrier, commands, results):
+    """
+    Process stepping one subdomain. Halo values are exchanged through two
+    shared exchange buffers, alternating between steps, so a worker writing
+    the next step never overwrites values another worker is still reading.
+    """
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        global_oil, *exchange = [np.ndarray((n_cells,), dtype=float, buffer=block.buf) for block in blocks]
+        local_cells = np.concatenate([subdomain.owned, subdomain.halo])
+        n_owned = len(subdomain.owned)
+        while True:
+            command = commands.get()
+            if command is None:
+                break
+            try:
+                # Scatter from the global ordering, then step with halo exchange only
+                oil = global_oil[local_cells].copy()
+                for step in range(command):
+                    oil[:n_owned] = subdomain.step(oil)
+                    buffer = exchange[step % 2]
+                    buffer[subdomain.send] = oil[subdomain.send_local]
+                    barrier.wait()
+                    oil[subdomain.receive_local] = buffer[subdomain.receive]
+                # Gather the owned cells back into the global ordering
+                global_oil[subdomain.owned] = oil[:n_owned]
+                results.put(None)
+            except Exception:
+                barrier.abort()
+                results.put(traceback.format_exc())
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class DomainDecomposition:
+    def __init__(self, arrays, delta_t, processes) -> None:
+        """
+        Steps the mesh in worker processes, one subdomain each, partitioned by
+        recursive coordinate bisection of the triangle centroids.
+        :param arrays: MeshArrays of the mesh
+        :param delta_t: Time step
+        :param processes: Number of worker processes
+        """
+        self._n_cells = arrays.n_cells
+        cells = arrays.triangle_cells.astype(np.int64)
+        self._parts = recursive_coordinate_bisection(arrays.centroids[cells], processes)
+        subdomains = [Subdomain(arrays, cells, self._parts, part, delta_t) for part in range(processes)]
+
+        size = max(self._n_cells, 1) * np.dtype(float).itemsize
+        self._blocks = [shared_memory.SharedMemory(create=True, size=size) for _ in range(3)]
+        self._global_oil = np.ndarray((self._n_cells,), dtype=float, buffer=self._blocks[0].buf)
+
+        context = multiprocessing.get_context()
+        barrier = context.Barrier(processes)
+        self._results = context.Queue()
+        self._commands = [context.Queue() for _ in range(processes)]
+        self._workers = [
+            context.Process(target=_worker, daemon=True, args=(
+                subdomain, [block.name for block in self._blocks], self._n_cells, barrier, commands, self._results))
+            for subdomain, commands in zip(subdomains, self._commands)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def parts(self):
+        """
+        Subdomain of every triangle, in the order of MeshArrays.triangle_cells
+        """
+        return self._parts
+
+    def advance(self, oil, n_steps):
+        """
+        Advance the global oil array n_steps in the workers.
+        :return: Oil of every cell in the global ordering after n_steps
+        """
+        self._global_oil[:] = oil
+        for commands in self._commands:
+            commands.put(n_steps)
+        errors = [self._results.get() for _ in self._workers]
+        errors = [error for error in errors if error is not None]
+        if errors:
+            raise RuntimeError("Worker process failed:\n" + errors[0])
+        return self._global_oil.copy()
+
+    def close(self):
+        for commands in self._commands:
+            commands.put(None)
+        for worker in self._workers:
+            worker.join()
+        for block in self._blocks:
+            block.close()
+            block.unlink()
@@ -0,0 +1,67 @@
+import numpy as np
+
+# Oil in the fish area, area weighted, above which the oil counts as arrived
+ARRIVAL_THRESHOLD = 1e-3
+
+
+def area_cells(arrays, borders):
+    """
+    Cells of the triangles whose centroids lie in a rectangle
+    :param borders: [[x min, x max], [y min, y max]]
+    :return: Sorted cell indices
+    """
+    (x_min, x_max), (y_min, y_max) = borders
+    if x_min > x_max or y_min > y_max:
+        raise ValueError(f"Borders {borders} must be [[x min, x max], [y min, y max]]")
+    x, y = arrays.centroids[:, 0], arrays.centroids[:, 1]
+    inside = arrays.is_triangle & (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+    return np.flatnonzero(inside)
+
+
+class ExposureTracker:
+    def __init__(self, arrays, borders, threshold=ARRIVAL_THRESHOLD) -> None:
+        """
+        Oil in the fish area after every step. The cells in the area are found
+        once, a step only sums their oil weighted by their areas.
+        :param arrays: MeshArrays of the mesh the oil belongs to
+        :param borders: [[x min, x max], [y min, y max]] of the fish area
+        :param threshold: Oil in the area at which the oil has arrived
+        """
+        self._cells = area_cells(arrays, borders)
+        self._areas = arrays.areas[self._cells]
+        self._threshold = threshold
+        self._times = []
+        self._totals = []
+
+    @property
+    def cells(self):
+        return self._cells
+
+    @property
+    def times(self):
+        return np.array(self._times)
+
+    @property
+    def totals(self):
+        """
+        Oil in the area at every recorded time, (times, members) for an ensemble
+        """
+        return np.array(self._totals)
+
+    def total(self, oil):
+        """
+        Oil in the area, one value per member for an ensemble
+        """
+        return self._areas @ oil[self._cells]
+
+    def record(self, time, oil):
+        self._times.append(time)
+        self._totals.append(self.total(oil))
+
+    def first_arrival(self):
+        """
+        First recorded time the oil in the area is above the threshold, nan if
+        it never is. One value per member for an ensemble.
+        """
+        arrived = self.totals > self._threshold
+        return np.where(arrived.any(axis=0), self.times[np.argmax(arrived, axis=0)], np.nan)
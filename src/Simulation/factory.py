@@ -6,7 +6,7 @@ class CellFactory:
         if key not in self._cellTypes:
             self._cellTypes[key] = name
 
-    def __call__(self, key: str, id: int, oil_amount: float = 0.0, area: float = 0.0, 
+    def __call__(self, key: str, id: int, state: object = None, area: float = 0.0, 
                 normal_vectors_with_faces: tuple = tuple(), faces: list = [], 
-                velocity_field: float = 0.0, neighbors: list = [], delta_t=0.01):
-        return self._cellTypes[key](id, oil_amount, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t)
+                velocity_field: float = 0.0, neighbors: list = [], delta_t=0.01, face_table: list = []):
+        return self._cellTypes[key](id, state, area, normal_vectors_with_faces, faces, velocity_field, neighbors, delta_t, face_table)
@@ -0,0 +1,163 @@
+import io
+import mmap
+
+import numpy as np
+
+# Gmsh element type: (meshio cell type, number of nodes)
+ELEMENT_TYPES = {
+    1: ("line", 2),
+    2: ("triangle", 3),
+    3: ("quad", 4),
+    4: ("tetra", 4),
+    8: ("line3", 3),
+    9: ("triangle6", 6),
+    15: ("vertex", 1),
+}
+
+# Lines parsed per call to np.loadtxt, bounds the size of the temporary copies
+CHUNK_LINES = 1 << 18
+
+
+class MeshData:
+    def __init__(self, points, cells_dict) -> None:
+        """
+        The part of a meshio.Mesh that Mesh uses.
+        :param points: (number of points, 3) coordinates
+        :param cells_dict: Dict from cell type to (number of cells, points per cell) point indices
+        """
+        self._points = points
+        self._cells_dict = cells_dict
+
+    @property
+    def points(self):
+        return self._points
+
+    @property
+    def cells_dict(self):
+        return self._cells_dict
+
+
+class LineIndex:
+    def __init__(self, data) -> None:
+        """
+        Byte offset of every line of a memory mapped file, found with one
+        vectorized search for line breaks, so blocks of lines can be handed
+        to the parser without splitting the file into Python strings.
+        """
+        self._data = data
+        breaks = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n"))
+        self._starts = np.concatenate([[0], breaks + 1])
+
+    def line_of(self, text):
+        """
+        Number of the first line that is exactly text, with LF or CRLF line endings
+        """
+        offsets = [self._data.find(b"\n" + text + ending) for ending in [b"\n", b"\r\n"]]
+        offsets = [offset for offset in offsets if offset >= 0]
+        if not offsets:
+            raise ValueError(f"Missing {text.decode()}")
+        return int(np.searchsorted(self._starts, min(offsets) + 1))
+
+    def header(self, line):
+        return [int(value) for value in self._data[self._starts[line]:self._starts[line + 1]].split()]
+
+    def table(self, first, n_rows, n_columns, dtype, out=None):
+        """
+        Parse n_rows lines from line first into an array, CHUNK_LINES lines at a time
+        :param out: Optional preallocated (n_rows, n_columns) array
+        """
+        if out is None:
+            out = np.empty((n_rows, n_columns), dtype=dtype)
+        for start in range(0, n_rows, CHUNK_LINES):
+            stop = min(start + CHUNK_LINES, n_rows)
+            text = self._data[self._starts[first + start]:self._starts[first + stop]]
+            out[start:stop] = np.loadtxt(io.BytesIO(text), dtype=dtype, ndmin=2)[:, :n_columns]
+        return out
+
+
+def read_nodes(lines, line):
+    """
+    Parse the $Nodes section of Gmsh 4.1 that starts at line
+    :return: (points in file order, lookup array from node tag to point index)
+    """
+    n_blocks, n_nodes, _, max_tag = lines.header(line)
+    line += 1
+    points = np.empty((n_nodes, 3))
+    tags = np.empty((n_nodes, 1), dtype=np.int64)
+    filled = 0
+    for _ in range(n_blocks):
+        _, _, _, n_block = lines.header(line)
+        line += 1
+        # Tags first, then x y z, parametric coordinates after them are not needed
+        lines.table(line, n_block, 1, np.int64, tags[filled:filled + n_block])
+        lines.table(line + n_block, n_block, 3, float, points[filled:filled + n_block])
+        line += 2 * n_block
+        filled += n_block
+
+    lookup = np.full(max_tag + 1, -1, dtype=np.int64)
+    lookup[tags[:, 0]] = np.arange(n_nodes)
+    return points, lookup
+
+
+def read_elements(lines, line, lookup):
+    """
+    Parse the $Elements section of Gmsh 4.1 that starts at line
+    :return: Dict from cell type to point indices, blocks of the same type concatenated in file order
+    """
+    n_blocks = lines.header(line)[0]
+    line += 1
+    blocks = {}
+    for _ in range(n_blocks):
+        _, _, element_type, n_block = lines.header(line)
+        line += 1
+        if element_type not in ELEMENT_TYPES:
+            raise ValueError(f"Unsupported Gmsh element type {element_type}")
+        cell_type, n_nodes = ELEMENT_TYPES[element_type]
+        # The first column is the element tag
+        elements = lines.table(line, n_block, 1 + n_nodes, np.int64)
+        blocks.setdefault(cell_type, []).append(lookup[elements[:, 1:]])
+        line += n_block
+    return {cell_type: np.concatenate(data) for cell_type, data in blocks.items()}
+
+
+def read_gmsh41(path):
+    """
+    Read nodes and elements of an ASCII Gmsh 4.1 file straight into NumPy arrays
+    :return: MeshData with the same points and cells_dict as meshio.read
+    """
+    if not is_gmsh41(path):
+        raise ValueError(f"{path} is not an ASCII Gmsh 4.1 file")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        lines = LineIndex(data)
+        points, lookup = read_nodes(lines, lines.line_of(b"$Nodes") + 1)
+        cells_dict = read_elements(lines, lines.line_of(b"$Elements") + 1, lookup)
+        del lines  # Release the view of the map before it is closed
+    return MeshData(points, cells_dict)
+
+
+def is_gmsh41(path):
+    """
+    True if the file starts with the header of an ASCII Gmsh 4.1 file
+    """
+    try:
+        with open(path) as f:
+            return f.readline().strip() == "$MeshFormat" and f.readline().split()[:2] == ["4.1", "0"]
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def read_mesh(path):
+    """
+    Read a mesh with the Gmsh 4.1 reader when possible, otherwise with meshio,
+    which is only imported for the other formats and for 4.1 files the fast
+    reader cannot parse.
+    :return: Object with points and cells_dict, MeshData or meshio.Mesh
+    """
+    if is_gmsh41(path):
+        try:
+            return read_gmsh41(path)
+        except (ValueError, IndexError) as e:
+            # Parts of the format the fast reader does not handle, meshio does
+            print(f"Reading {path} with meshio: {e}")
+    import meshio
+    return meshio.read(path)
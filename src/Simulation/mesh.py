@@ -3,14 +3,19 @@ import numpy as np
 from numpy.linalg import norm
 
 from src.Simulation.cells import Line, Triangle, Vertex
+from src.Simulation.connectivity import EdgeConnectivity, cell_edges
 from src.Simulation.factory import CellFactory
+from src.Simulation.mesh_arrays import MeshArrays
+from src.Simulation.state import OilState
 
 
 class Mesh:
-    def __init__(self, mesh) -> None:
+    def __init__(self, mesh, x_star=None) -> None:
         self._mesh = mesh
+        # Center of the initial oil spill
+        self._x_star = np.array([0.35, 0.45] if x_star is None else x_star, dtype=float)
 
-    def main_function(self):
+    def main_function(self, delta_t=0.01):
         self._cells = []  # List of all cells
         # Create a global cell index mapping
         global_index = 1
@@ -51,7 +56,8 @@ class Mesh:
                 # Calculate normal vectors for the faces of the current cell
                 for face in cell_faces[global_cell_index]:
                     normal_vector = self.normal_vectors_with_faces(face, point_coordinates, midpoints[global_cell_index])
-                    face_with_normal_vector[face] = normal_vector
+                    # Keyed per cell, a shared face needs an outward normal for each side
+                    face_with_normal_vector[(global_cell_index, face)] = normal_vector
 
                 # Now, use the midpoint of the current cell for the velocity field
                 velocity_fields[global_cell_index] = self.velocity_field(midpoints[global_cell_index])
@@ -68,11 +74,13 @@ class Mesh:
                 'oil_amount': (oil_values.get(global_cell_index, 0)),
                 'area': (areas.get(global_cell_index, 0)),
                 'faces': [
-                    (face_with_normal_vector.get(face)) 
+                    (face_with_normal_vector.get((global_cell_index, face)))
                     for face in cell_faces.get(global_cell_index, [])
                 ],
                 'velocity_field': ((velocity_fields.get(global_cell_index, np.array([0, 0])))),
-                'neighbors': []
+                'neighbors': [],
+                'face_table': self.face_table(global_cell_index, cell_faces, face_to_cells,
+                                              face_with_normal_vector, velocity_fields),
             }
 
             # Adding details for each neighbor
@@ -87,27 +95,203 @@ class Mesh:
                 neighbor_velocity_field = velocity_fields.get(neighbor, np.array([0, 0]))
                 neighbor_velocity_field_magnitude = (neighbor_velocity_field)
 
-                # Get the neighbor's oil amount
-                neighbor_oil_amount = oil_values.get(neighbor, 0)
-
                 # Add the neighbor's data
                 neighbor_data = {
                     'neighbor_index': neighbor,
                     'neighbor_faces': shared_faces,
                     'neighbor_velocity_field': (neighbor_velocity_field_magnitude),
-                    'neighbor_oil_amount': (neighbor_oil_amount)
                 }
                 cell_data['neighbors'].append(neighbor_data)
 
             final_cell_data[global_cell_index] = cell_data
 
+        # One shared array holds the oil of every cell, cells read from it by index
+        self._state = OilState([final_cell_data[index]['oil_amount'] for index in sorted(final_cell_data)])
+
+        # Flat arrays of the same data for code that does not need cell objects
+        self._arrays = self.build_arrays(final_cell_data, cell_type_mapping, midpoints)
+
         # Print or return the final cell data
-        self.register_cell(self._cells, final_cell_data, cell_type_mapping)
+        self.register_cell(self._cells, final_cell_data, cell_type_mapping, delta_t)
 
         return final_cell_data, cell_type_mapping
 
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def arrays(self):
+        return self._arrays
+
+    def build_arrays(self, final_cell_data, cell_type_mapping, midpoints):
+        """
+        Pack the per-cell dictionaries into a MeshArrays object. Row i holds
+        the cell with global index i + 1.
+        """
+        cell_ids = sorted(final_cell_data)
+        type_offsets = {
+            cell_type: cell_type_mapping[(cell_type, 0)] - 1
+            for cell_type, cell_data in self._mesh.cells_dict.items() if len(cell_data) > 0
+        }
+        triangles = self._mesh.cells_dict.get("triangle", np.empty((0, 3), dtype=int))
+        triangle_cells = type_offsets.get("triangle", 0) + np.arange(len(triangles))
+
+        face_tables = [final_cell_data[index]['face_table'] for index in cell_ids]
+        neighbor_ptr = np.concatenate([[0], np.cumsum([len(table) for table in face_tables])])
+        faces = [face for table in face_tables for face in table]
+
+        return MeshArrays(
+            points=self._mesh.points[:, :2],
+            triangles=triangles,
+            triangle_cells=triangle_cells,
+            type_offsets=type_offsets,
+            centroids=[midpoints[index] for index in cell_ids],
+            areas=[final_cell_data[index]['area'] for index in cell_ids],
+            initial_oil=[final_cell_data[index]['oil_amount'] for index in cell_ids],
+            neighbor_ptr=neighbor_ptr,
+            neighbor_index=[neighbor - 1 for neighbor, _, _ in faces],
+            face_coefficients=[coefficient for _, _, coefficient in faces],
+        )
+
+    def compute_arrays(self):
+        """
+        Set up the mesh with array operations only and return it as MeshArrays.
+        Gives the same arrays as main_function without creating any cell
+        objects or per-cell dictionaries. Also creates the shared OilState.
+        """
+        points = np.asarray(self._mesh.points)[:, :2]
+        cell_blocks = [(cell_type, np.asarray(cell_data)) for cell_type, cell_data in self._mesh.cells_dict.items()]
+
+        # Global numbering follows the cell blocks, so every type is a contiguous range
+        type_offsets = {}
+        n_cells = 0
+        for cell_type, cell_data in cell_blocks:
+            type_offsets[cell_type] = n_cells
+            n_cells += len(cell_data)
+
+        centroids = np.concatenate([self.centroids(cell_data, points) for _, cell_data in cell_blocks])
+        triangles = self._mesh.cells_dict.get("triangle", np.empty((0, 3), dtype=int))
+        triangle_cells = type_offsets.get("triangle", 0) + np.arange(len(triangles))
+        areas = np.zeros(n_cells)
+        areas[triangle_cells] = self.triangle_areas(triangles, points)
+        velocities = self.velocity_field(centroids.T).T
+        initial_oil = self.initial_oil_values(centroids)
+
+        # Faces of every cell in cell order: one per line, three per triangle
+        face_keys = []
+        face_cells = []
+        for cell_type, cell_data in cell_blocks:
+            keys = cell_edges(cell_data)
+            face_keys.append(keys.reshape(-1, 2))
+            face_cells.append(np.repeat(type_offsets[cell_type] + np.arange(len(cell_data)), keys.shape[1]))
+        face_keys = np.concatenate(face_keys)
+        face_cells = np.concatenate(face_cells)
+
+        face_normals = self.face_normals(face_keys, points, centroids[face_cells])
+        connectivity = EdgeConnectivity(face_keys, face_cells, n_cells)
+        face_neighbors = connectivity.face_neighbors
+
+        # Keep faces that have a cell on the other side
+        shared = face_neighbors >= 0
+        face_cells = face_cells[shared]
+        face_neighbors = face_neighbors[shared]
+        face_normals = face_normals[shared]
+        v_avg = 0.5 * (velocities[face_cells] + velocities[face_neighbors])
+
+        self._arrays = MeshArrays(
+            points=points,
+            triangles=triangles,
+            triangle_cells=triangle_cells,
+            type_offsets=type_offsets,
+            centroids=centroids,
+            areas=areas,
+            initial_oil=initial_oil,
+            neighbor_ptr=connectivity.neighbor_ptr,
+            neighbor_index=connectivity.neighbor_index,
+            face_coefficients=np.einsum("ij,ij->i", v_avg, face_normals),
+        )
+        self._state = OilState(initial_oil)
+        return self._arrays
+
+    def use_arrays(self, arrays):
+        """
+        Use precomputed MeshArrays, for example from the mesh cache, instead
+        of calling compute_arrays. Creates the shared OilState from their initial oil.
+        """
+        self._arrays = arrays
+        self._state = OilState(arrays.initial_oil)
+        return self._arrays
+
+    def centroids(self, cell_data, points):
+        """
+        Vectorized midpoint: the mean of the points of every cell in cell_data
+        """
+        corners = points[cell_data]
+        total = corners[:, 0]
+        for i in range(1, corners.shape[1]):
+            total = total + corners[:, i]
+        return total / corners.shape[1]
+
+    def triangle_areas(self, triangles, points):
+        """
+        Vectorized area of every triangle
+        """
+        x1, y1 = points[triangles[:, 0]].T
+        x2, y2 = points[triangles[:, 1]].T
+        x3, y3 = points[triangles[:, 2]].T
+        return 0.5 * np.abs(x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+
+    def face_normals(self, face_keys, points, cell_midpoints):
+        """
+        Vectorized normal_vectors_with_faces: scaled normal of every face,
+        flipped to point away from the midpoint of the cell it belongs to.
+        :param face_keys: (number of faces, 2) sorted point indices of every face
+        :param cell_midpoints: (number of faces, 2) midpoint of the cell of every face
+        """
+        point1 = points[face_keys[:, 0]]
+        point2 = points[face_keys[:, 1]]
+        direction = point2 - point1
+        normal = np.stack([-direction[:, 1], direction[:, 0]], axis=1)
+        normal *= np.linalg.norm(direction, axis=1)[:, None]
+
+        vector_to_face_midpoint = (point1 + point2) / 2 - cell_midpoints
+        inward = np.einsum("ij,ij->i", normal, vector_to_face_midpoint) < 0
+        normal[inward] = -normal[inward]
+        return normal
+
+    def initial_oil_values(self, centroids, x_star=None, amplitude=1.0):
+        """
+        Vectorized initial_oil for an array of cell midpoints
+        :param x_star: Center of the spill, defaults to the one of the mesh
+        :param amplitude: Oil amount in the center of the spill
+        """
+        x_star = self._x_star if x_star is None else np.asarray(x_star, dtype=float)
+        distance = norm(centroids - x_star, axis=1)
+        return amplitude * np.exp(-distance**2 / 0.01)
+
+    def ensemble_state(self, x_stars, amplitudes=None):
+        """
+        Replace the state with one column of oil per spill scenario, so all
+        members are advanced together by the same operator.
+        Call after compute_arrays or main_function.
+        :param x_stars: Center of the spill of every member
+        :param amplitudes: Oil amount in the center of every spill, defaults to 1
+        :return: OilState with current of shape (number of cells, number of members)
+        """
+        if amplitudes is None:
+            amplitudes = [1.0] * len(x_stars)
+        if len(amplitudes) != len(x_stars):
+            raise ValueError(f"Got {len(x_stars)} spill centers but {len(amplitudes)} amplitudes")
+        centroids = self._arrays.centroids
+        initial_oil = np.stack([
+            self.initial_oil_values(centroids, x_star, amplitude) for x_star, amplitude in zip(x_stars, amplitudes)
+        ], axis=1)
+        self._state = OilState(initial_oil)
+        return self._state
+
     def initial_oil(self, cell_points, point_coordinates):
-        x_star = np.array([0.35, 0.45])
+        x_star = self._x_star
         oil_values = {}
 
         for global_cell_index, cell_points in cell_points.items():
@@ -200,6 +384,24 @@ class Mesh:
         for face in faces:
             face_to_cells[face].append(global_cell_index)
 
+    def face_table(self, global_cell_index, cell_faces, face_to_cells, face_with_normal_vector, velocity_fields):
+        """
+        Resolve every face of a cell to the neighbor on the other side once, so
+        the time loop does not have to match faces.
+        :return: List of (neighbor id, scaled outward normal, face velocity coefficient)
+                 where the coefficient is the average face velocity dotted with the normal
+        """
+        table = []
+        for face in cell_faces.get(global_cell_index, []):
+            cells = face_to_cells[face]
+            if len(cells) != 2:  # Faces on the edge of the mesh have no neighbor
+                continue
+            neighbor = cells[0] if cells[1] == global_cell_index else cells[1]
+            _, normal = face_with_normal_vector[(global_cell_index, face)]
+            v_avg = 0.5 * (velocity_fields[global_cell_index] + velocity_fields[neighbor])
+            table.append((neighbor, normal, float(np.dot(v_avg, normal))))
+        return table
+
     def find_neighbors(self, face_to_cells):
         cell_neighbors = defaultdict(set)
         for face, cells in face_to_cells.items():
@@ -208,7 +410,7 @@ class Mesh:
                 cell_neighbors[cells[1]].add(cells[0])
         return cell_neighbors
 
-    def register_cell(self, cells, final_cell_data, cell_type_mapping):
+    def register_cell(self, cells, final_cell_data, cell_type_mapping, delta_t=0.01):
         cf = CellFactory()
         cf.register("vertex", Vertex)
         cf.register("line", Line)
@@ -220,23 +422,24 @@ class Mesh:
                 cell_info = final_cell_data[global_cell_index]
                 
                 # Extract parameters for the cell
-                oil_amount = cell_info["oil_amount"]
                 area = cell_info["area"]
                 normal_vectors_with_faces = cell_info["faces"]
                 velocity_field = cell_info["velocity_field"]
                 neighbors = cell_info["neighbors"]
+                face_table = cell_info["face_table"]
 
                 # Create the cell using CellFactory
                 cell_object = cf(
                     key=cell_type,
                     id=global_cell_index,
-                    oil_amount=oil_amount,
+                    state=self._state,
                     area=area,
                     normal_vectors_with_faces=normal_vectors_with_faces,
                     faces=normal_vectors_with_faces,
                     velocity_field=velocity_field,
                     neighbors=neighbors,
-                    delta_t=0.01,  # Default delta_t
+                    face_table=face_table,
+                    delta_t=delta_t,
                 )
                 
                 cells.append(cell_object)
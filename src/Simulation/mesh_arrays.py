@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class MeshArrays:
+    def __init__(self, points, triangles, triangle_cells, type_offsets, centroids, areas,
+                 initial_oil, neighbor_ptr, neighbor_index, face_coefficients) -> None:
+        """
+        Struct of arrays view of a mesh. Cells are indexed by global cell index - 1,
+        the same order as Mesh._cells and OilState. Only what the solvers read is
+        kept: the velocities and face normals are folded into face_coefficients.
+        :param points: (number of points, 2) coordinates
+        :param triangles: (number of triangles, 3) point indices of every triangle
+        :param triangle_cells: Cell index of every row in triangles
+        :param type_offsets: Dict from cell type to the cell index of its first cell
+        :param centroids: (number of cells, 2) midpoint of every cell
+        :param areas: Area of every cell, zero for cells that are not triangles
+        :param initial_oil: Oil amount of every cell at the start time
+        :param neighbor_ptr: CSR row pointer, the faces of cell i are neighbor_ptr[i]:neighbor_ptr[i + 1]
+        :param neighbor_index: Cell index of the neighbor across every face
+        :param face_coefficients: Average face velocity dotted with the normal
+        """
+        self._points = np.asarray(points, dtype=float)
+        self._triangles = np.asarray(triangles, dtype=np.int32).reshape(-1, 3)
+        self._triangle_cells = np.asarray(triangle_cells, dtype=np.int32)
+        self._type_offsets = dict(type_offsets)
+        self._centroids = np.asarray(centroids, dtype=float).reshape(-1, 2)
+        self._areas = np.asarray(areas, dtype=float)
+        self._initial_oil = np.asarray(initial_oil, dtype=float)
+        self._neighbor_ptr = np.asarray(neighbor_ptr, dtype=np.int32)
+        self._neighbor_index = np.asarray(neighbor_index, dtype=np.int32)
+        self._face_coefficients = np.asarray(face_coefficients, dtype=float)
+
+        # Inverse of triangle_cells, -1 for cells that are not triangles
+        self._triangle_rows = np.full(len(self._areas), -1, dtype=np.int32)
+        self._triangle_rows[self._triangle_cells] = np.arange(len(self._triangle_cells), dtype=np.int32)
+
+    @property
+    def n_cells(self):
+        return len(self._areas)
+
+    @property
+    def points(self):
+        return self._points
+
+    @property
+    def triangles(self):
+        return self._triangles
+
+    @property
+    def triangle_cells(self):
+        return self._triangle_cells
+
+    @property
+    def triangle_rows(self):
+        return self._triangle_rows
+
+    @property
+    def type_offsets(self):
+        return self._type_offsets
+
+    @property
+    def centroids(self):
+        return self._centroids
+
+    @property
+    def areas(self):
+        return self._areas
+
+    @property
+    def initial_oil(self):
+        return self._initial_oil
+
+    @property
+    def neighbor_ptr(self):
+        return self._neighbor_ptr
+
+    @property
+    def neighbor_index(self):
+        return self._neighbor_index
+
+    @property
+    def face_coefficients(self):
+        return self._face_coefficients
+
+    @property
+    def face_owner(self):
+        """
+        Cell index the face belongs to, for every entry of neighbor_index
+        """
+        return np.repeat(np.arange(self.n_cells, dtype=np.int32), np.diff(self._neighbor_ptr))
+
+    @property
+    def is_triangle(self):
+        return self._triangle_rows >= 0
+
+    def global_index(self, cell_type, local_index):
+        """
+        Global cell index (starting at 1) of the local_index-th cell of a type,
+        the same number as cell_type_mapping[(cell_type, local_index)]
+        """
+        return self._type_offsets[cell_type] + local_index + 1
+
+    def nbytes(self):
+        """
+        Memory used by all arrays in bytes
+        """
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray))
@@ -0,0 +1,135 @@
+import hashlib
+import os
+
+import numpy as np
+
+from src.Simulation import connectivity, gmsh_reader, mesh_arrays
+from src.Simulation.atomic import write_atomic
+from src.Simulation import mesh as mesh_module
+from src.Simulation import reorder as reorder_module
+from src.Simulation.gmsh_reader import MeshData, read_mesh
+from src.Simulation.mesh import Mesh
+from src.Simulation.mesh_arrays import MeshArrays
+from src.Simulation.reorder import Reordering, reorder_mesh
+
+# Bump when the layout of the cache files changes
+CACHE_VERSION = 2
+
+# Arrays of MeshArrays stored in the cache, the initial oil depends on xStar and is recomputed
+ARRAY_FIELDS = ["triangles", "triangle_cells", "centroids", "areas",
+                "neighbor_ptr", "neighbor_index", "face_coefficients"]
+
+
+def code_version():
+    """
+    Hash of the cache version and the source of every module the cached arrays come from,
+    so changing the preprocessing code invalidates old cache files
+    """
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for module in [mesh_module, connectivity, mesh_arrays, reorder_module, gmsh_reader]:
+        with open(module.__file__, "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def cache_key(mesh_name, reorder=None):
+    """
+    Hash of the mesh file content, the reordering and the code version
+    """
+    digest = hashlib.sha256()
+    with open(mesh_name, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest.update(str(reorder).encode())
+    digest.update(code_version().encode())
+    return digest.hexdigest()
+
+
+def cache_path(mesh_name, key, cache_dir=None):
+    """
+    Cache file of a mesh, by default in a .mesh_cache folder next to the mesh file
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(mesh_name)), ".mesh_cache")
+    stem = os.path.splitext(os.path.basename(mesh_name))[0]
+    return os.path.join(cache_dir, f"{stem}-{key[:16]}.npz")
+
+
+def save_cache(path, msh, arrays, reordering=None):
+    """
+    Write the cells of the mesh and the arrays to an .npz file with
+    write_atomic, so workers running at the same time never read a half
+    written file.
+    """
+    cell_types = list(msh.cells_dict)
+    content = {
+        "points": np.asarray(msh.points),
+        "cell_types": np.array(cell_types),
+        "type_offsets": np.array([arrays.type_offsets.get(cell_type, 0) for cell_type in cell_types]),
+        "triangle_order": reordering.triangle_order if reordering is not None else np.empty(0, dtype=np.int64),
+        "point_order": reordering.point_order if reordering is not None else np.empty(0, dtype=np.int64),
+    }
+    for i, cell_type in enumerate(cell_types):
+        content[f"cells_{i}"] = np.asarray(msh.cells_dict[cell_type])
+    for field in ARRAY_FIELDS:
+        content[field] = getattr(arrays, field)
+
+    write_atomic(path, lambda f: np.savez(f, **content))
+
+
+def load_cache(path, x_star=None):
+    """
+    Read a cache file written by save_cache
+    :return: (Mesh with its arrays and state set, Reordering or None)
+    """
+    with np.load(path) as content:
+        cell_types = [str(cell_type) for cell_type in content["cell_types"]]
+        cells = {cell_type: content[f"cells_{i}"] for i, cell_type in enumerate(cell_types)}
+        mesh = Mesh(MeshData(content["points"], cells), x_star)
+        fields = {field: content[field] for field in ARRAY_FIELDS}
+        arrays = MeshArrays(
+            points=content["points"][:, :2],
+            type_offsets=dict(zip(cell_types, content["type_offsets"].tolist())),
+            initial_oil=mesh.initial_oil_values(fields["centroids"]),
+            **fields,
+        )
+        reordering = None
+        if len(content["triangle_order"]):
+            reordering = Reordering(content["triangle_order"], content["point_order"])
+    mesh.use_arrays(arrays)
+    return mesh, reordering
+
+
+def load_mesh(mesh_name, x_star=None, reorder=None, cache=True, cache_dir=None):
+    """
+    Read a mesh file and set up its arrays, through the cache when possible.
+    A cache file is only used if the mesh file, the reordering and the code are
+    the same as when it was written, otherwise the mesh is read again and the
+    cache is rebuilt.
+    :param mesh_name: Path of the .msh file
+    :param x_star: Center of the initial oil spill
+    :param reorder: None, "rcm" or "morton", see reorder_mesh
+    :param cache: Read and write the cache
+    :param cache_dir: Folder of the cache files, by default .mesh_cache next to the mesh
+    :return: (Mesh with compute_arrays done, Reordering or None)
+    """
+    path = cache_path(mesh_name, cache_key(mesh_name, reorder), cache_dir) if cache else None
+    if path is not None and os.path.exists(path):
+        try:
+            return load_cache(path, x_star)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Could not read mesh cache {path}, rebuilding it: {e}")
+
+    msh = read_mesh(mesh_name)
+    reordering = None
+    if reorder:
+        msh, reordering = reorder_mesh(msh, reorder)
+    mesh = Mesh(msh, x_star)
+    arrays = mesh.compute_arrays()
+
+    if path is not None:
+        try:
+            save_cache(path, msh, arrays, reordering)
+        except OSError as e:
+            print(f"Could not write mesh cache {path}: {e}")
+    return mesh, reordering
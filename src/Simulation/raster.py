@@ -0,0 +1,138 @@
+import numpy as np
+
+# Triangles tested per block when the pixel map is built, bounds the temporary arrays
+TRIANGLE_BLOCK = 1 << 14
+
+# Color of the pixels outside the mesh
+BACKGROUND = (255, 255, 255)
+
+
+def write_image(plot_filename, rgb):
+    """
+    Write (height, width, 3) uint8 RGB pixels as an image, the format follows the file extension
+    """
+    # Imported here so runs without images never load OpenCV
+    import cv2
+    if not cv2.imwrite(plot_filename, np.ascontiguousarray(rgb[:, :, ::-1])):
+        raise OSError(f"Could not write {plot_filename}")
+
+
+def colormap_lut(name="viridis", levels=256):
+    """
+    RGB table of a matplotlib colormap, the only use of matplotlib by the rasterizer
+    :return: (levels, 3) uint8 colors
+    """
+    from matplotlib import colormaps
+    return (colormaps[name](np.linspace(0.0, 1.0, levels))[:, :3] * 255).round().astype(np.uint8)
+
+
+def pixel_grid(points, width, height=None):
+    """
+    Pixel size and corner of an image covering the bounding box of the points.
+    Without height the pixels are square.
+    :return: (height, x of the left edge, y of the top edge, pixel width, pixel height)
+    """
+    x_min, y_min = points[:, :2].min(axis=0)
+    x_max, y_max = points[:, :2].max(axis=0)
+    dx = (x_max - x_min) / width
+    if height is None:
+        height = max(1, int(round((y_max - y_min) / dx)))
+    dy = (y_max - y_min) / height
+    return height, x_min, y_max, dx, dy
+
+
+def pixel_cells(points, triangles, width, height=None):
+    """
+    Triangle covering the center of every pixel, found by testing the pixels
+    in the bounding box of every triangle with barycentric coordinates.
+    :param points: (number of points, 2) coordinates
+    :param triangles: Point indices of every triangle
+    :return: (height, width) array of triangle indices, len(triangles) outside the mesh
+    """
+    height, left, top, dx, dy = pixel_grid(points, width, height)
+    n_triangles = len(triangles)
+    cells = np.full(height * width, n_triangles, dtype=np.int64)
+    corners = points[:, :2][triangles]
+
+    for first in range(0, n_triangles, TRIANGLE_BLOCK):
+        block = corners[first:first + TRIANGLE_BLOCK]
+        # Range of pixel columns and rows whose centers can lie in each triangle
+        columns = np.clip(np.floor((block[:, :, 0] - left) / dx - 0.5), 0, width - 1).astype(np.int64)
+        rows = np.clip(np.floor((top - block[:, :, 1]) / dy - 0.5), 0, height - 1).astype(np.int64)
+        first_column, n_columns = columns.min(axis=1), columns.max(axis=1) - columns.min(axis=1) + 2
+        first_row, n_rows = rows.min(axis=1), rows.max(axis=1) - rows.min(axis=1) + 2
+
+        # One candidate per pixel of every bounding box
+        counts = n_columns * n_rows
+        triangle = np.repeat(np.arange(len(block)), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        column = first_column[triangle] + offset % n_columns[triangle]
+        row = first_row[triangle] + offset // n_columns[triangle]
+        inside_image = (column < width) & (row < height)
+        triangle, column, row = triangle[inside_image], column[inside_image], row[inside_image]
+
+        # Barycentric coordinates of the pixel centers
+        x = left + (column + 0.5) * dx
+        y = top - (row + 0.5) * dy
+        a, b, c = block[triangle, 0], block[triangle, 1], block[triangle, 2]
+        determinant = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+        s = ((x - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (y - a[:, 1])) / determinant
+        t = ((b[:, 0] - a[:, 0]) * (y - a[:, 1]) - (x - a[:, 0]) * (b[:, 1] - a[:, 1])) / determinant
+        # Small tolerance so pixels on shared edges are never left out
+        inside = (s >= -1e-12) & (t >= -1e-12) & (s + t <= 1 + 1e-12)
+        cells[row[inside] * width + column[inside]] = first + triangle[inside]
+    return cells.reshape(height, width)
+
+
+class Rasterizer:
+    def __init__(self, points, triangles, width=800, height=None, color_limits=(0.0, 1.0), lut=None) -> None:
+        """
+        Frames drawn without matplotlib. Which triangle covers every pixel is
+        found once, a frame is then a lookup of the oil of every pixel and of
+        its color in a table.
+        :param points: (number of points, 2) coordinates
+        :param triangles: Point indices of every triangle
+        :param width: Image width in pixels
+        :param height: Image height in pixels, by default so the pixels are square
+        :param color_limits: (lowest, highest) oil amount of the color scale, the same in every frame
+        :param lut: (levels, 3) uint8 color table, by default viridis
+        """
+        self._cells = pixel_cells(points, triangles, width, height)
+        self._n_triangles = len(triangles)
+        self._color_limits = color_limits
+        lut = colormap_lut() if lut is None else lut
+        # The last entry is the color outside the mesh
+        self._lut = np.vstack([lut, np.array(BACKGROUND, dtype=np.uint8)])
+        self._levels = np.empty(self._n_triangles + 1, dtype=np.intp)
+        self._levels[-1] = len(lut)
+
+    @property
+    def cells(self):
+        """
+        (height, width) triangle index of every pixel, the number of triangles outside the mesh
+        """
+        return self._cells
+
+    @property
+    def shape(self):
+        return self._cells.shape
+
+    def rgb(self, oil_amounts, step=None):
+        """
+        Color every pixel by the oil of its triangle
+        :param step: Not shown, accepted like FrameRenderer.rgb
+        :return: (height, width, 3) uint8 pixels
+        """
+        lowest, highest = self._color_limits
+        n_levels = len(self._lut) - 1
+        # Equal limits give a scale of width 1, the oil at the limit gets the lowest color
+        span = highest - lowest if highest != lowest else 1.0
+        scaled = (np.asarray(oil_amounts) - lowest) * (n_levels / span)
+        self._levels[:-1] = np.clip(scaled, 0, n_levels - 1)
+        return self._lut[self._levels[self._cells]]
+
+    def save(self, oil_amounts, step, plot_filename):
+        """
+        Draw a frame and write it as an image
+        """
+        write_image(plot_filename, self.rgb(oil_amounts, step))
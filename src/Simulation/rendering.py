@@ -0,0 +1,216 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.Simulation.raster import Rasterizer, write_image
+
+# Renderer of a render worker, built once by init_worker
+_worker_renderer = None
+
+# Frames per second of the videos
+VIDEO_FPS = 10
+
+
+class FrameRenderer:
+    def __init__(self, points, triangles, color_limits=(0.0, 1.0), figsize=(8, 6)) -> None:
+        """
+        Figure, triangulation and colorbar built once and reused for every frame,
+        a frame only replaces the face colors and the title.
+        :param points: (number of points, 2) coordinates
+        :param triangles: Point indices of every triangle
+        :param color_limits: (lowest, highest) oil amount of the color scale, the same in every frame
+        """
+        # Imported here so runs without plots never load matplotlib
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from matplotlib.tri import Triangulation
+
+        self._figure = Figure(figsize=figsize)
+        self._canvas = FigureCanvasAgg(self._figure)
+        axes = self._figure.add_subplot()
+        triangulation = Triangulation(points[:, 0], points[:, 1], triangles)
+        self._collection = axes.tripcolor(triangulation, facecolors=np.zeros(len(triangles)),
+                                          cmap="viridis", shading="flat",
+                                          vmin=color_limits[0], vmax=color_limits[1])
+        self._figure.colorbar(self._collection, label="Oil Amount")
+        self._title = axes.set_title("")
+        axes.set_xlabel("X")
+        axes.set_ylabel("Y")
+
+    def draw(self, oil_amounts, step):
+        """
+        Show the oil of every triangle at step
+        """
+        self._collection.set_array(oil_amounts)
+        self._title.set_text(f"Oil Distribution at Step {step}")
+
+    def rgb(self, oil_amounts, step):
+        """
+        Draw a frame into the canvas
+        :return: (height, width, 3) uint8 pixels of the frame
+        """
+        self.draw(oil_amounts, step)
+        self._canvas.draw()
+        return np.asarray(self._canvas.buffer_rgba())[:, :, :3].copy()
+
+    def save(self, oil_amounts, step, plot_filename):
+        """
+        Draw a frame and write it as an image
+        """
+        self.draw(oil_amounts, step)
+        self._figure.savefig(plot_filename)
+
+
+class VideoSink:
+    def __init__(self, path, fps=VIDEO_FPS) -> None:
+        """
+        Encodes RGB frames into a video as they arrive. The writer is opened
+        with the size of the first frame.
+        :param path: .mp4 file
+        """
+        self._path = path
+        self._fps = fps
+        self._writer = None
+        self._frames = 0
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def frames(self):
+        return self._frames
+
+    def write(self, rgb):
+        """
+        Append a (height, width, 3) uint8 frame
+        """
+        if self._writer is None:
+            # Imported here so runs without video never load OpenCV
+            import cv2
+            height, width, _ = rgb.shape
+            self._writer = cv2.VideoWriter(self._path, cv2.VideoWriter_fourcc(*'mp4v'), self._fps, (width, height))
+            if not self._writer.isOpened():
+                raise OSError(f"Could not open video {self._path}")
+        # OpenCV expects the channels in BGR order
+        self._writer.write(np.ascontiguousarray(rgb[:, :, ::-1]))
+        self._frames += 1
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+            print(f"Video created successfully: {self._path}")
+
+
+def init_worker(points, triangles, color_limits, rasterizer=None):
+    global _worker_renderer
+    _worker_renderer = rasterizer or FrameRenderer(points, triangles, color_limits)
+
+
+def render_frame(oil_amounts, step, plot_filename=None, video=False, renderer=None):
+    """
+    Write the frame as an image if plot_filename is given
+    :return: RGB pixels of the frame if video, otherwise None
+    """
+    renderer = renderer or _worker_renderer
+    if not video:
+        renderer.save(oil_amounts, step, plot_filename)
+        return None
+    rgb = renderer.rgb(oil_amounts, step)
+    if plot_filename is not None:
+        # The frame is already drawn, only encode it
+        write_image(plot_filename, rgb)
+    return rgb
+
+
+class FramePool:
+    def __init__(self, points, triangles, workers=1, max_pending=None, color_limits=(0.0, 1.0),
+                 raster_width=None) -> None:
+        """
+        Renders frames in background processes while the solver continues.
+        Every worker builds one FrameRenderer, a frame only sends the oil.
+        Frames for a video come back as RGB pixels and are encoded in the
+        order they were submitted.
+        :param points: (number of points, 2) coordinates
+        :param triangles: Point indices of every triangle
+        :param workers: Number of render processes, 0 renders in the calling process
+        :param max_pending: Frames queued or being rendered before submit waits, by default 2 per worker
+        :param color_limits: (lowest, highest) oil amount of the color scale of every frame
+        :param raster_width: Image width of a Rasterizer used instead of matplotlib, built once
+                             here and sent to the workers
+        """
+        self._max_pending = max_pending or 2 * max(workers, 1)
+        # (future, video path) of every unfinished frame in submission order
+        self._pending = deque()
+        self._videos = {}
+        self._error = None
+        self._renderer = None
+        self._pool = None
+        rasterizer = None
+        if raster_width:
+            rasterizer = Rasterizer(points, triangles, raster_width, color_limits=color_limits)
+        if workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                             initargs=(points, triangles, color_limits, rasterizer))
+        else:
+            self._renderer = rasterizer or FrameRenderer(points, triangles, color_limits)
+
+    def submit(self, oil_amounts, step, plot_filename=None, video=None):
+        """
+        Queue a copy of the oil to be rendered. Waits while max_pending frames
+        are unfinished, and raises if a frame has failed.
+        :param plot_filename: Image the frame is written to, or None
+        :param video: Video file the frame is appended to, or None
+        """
+        self._raise_error()
+        if plot_filename is None and video is None:
+            return
+        if video is not None and video not in self._videos:
+            self._videos[video] = VideoSink(video)
+        if self._pool is None:
+            rgb = render_frame(oil_amounts, step, plot_filename, video is not None, self._renderer)
+            if video is not None:
+                self._videos[video].write(rgb)
+            return
+        while len(self._pending) >= self._max_pending:
+            self._finish_oldest()
+            self._raise_error()
+        future = self._pool.submit(render_frame, np.array(oil_amounts), step, plot_filename, video is not None)
+        self._pending.append((future, video))
+
+    def close(self):
+        """
+        Wait for every queued frame, stop the workers, finish the videos and
+        raise the first rendering error
+        """
+        if self._pool is not None:
+            while self._pending:
+                self._finish_oldest()
+            self._pool.shutdown()
+            self._pool = None
+        for sink in self._videos.values():
+            sink.close()
+        self._raise_error()
+
+    def _finish_oldest(self):
+        future, video = self._pending.popleft()
+        try:
+            rgb = future.result()
+            # Frames after a failed one are dropped, the video would have a gap
+            if video is not None and self._error is None:
+                self._videos[video].write(rgb)
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError("Rendering a frame failed") from self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,125 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+from src.Simulation.connectivity import EdgeConnectivity, cell_edges
+from src.Simulation.gmsh_reader import MeshData
+
+
+def morton_order(centroids, bits=16):
+    """
+    Order cells along a Morton (Z-order) curve through their midpoints.
+    :param centroids: (number of cells, 2) midpoints
+    :param bits: Resolution of the grid the midpoints are snapped to, per axis
+    :return: Cell indices in curve order
+    """
+    low = centroids.min(axis=0)
+    extent = np.maximum(centroids.max(axis=0) - low, np.finfo(float).tiny)
+    grid = ((centroids - low) / extent * (2**bits - 1)).astype(np.uint64)
+
+    # Interleave the bits of x and y
+    code = np.zeros(len(centroids), dtype=np.uint64)
+    for bit in range(bits):
+        code |= ((grid[:, 0] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit)
+        code |= ((grid[:, 1] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit + 1)
+    return np.argsort(code, kind="stable")
+
+
+def rcm_order(triangles):
+    """
+    Reverse Cuthill-McKee order of the triangle adjacency graph, which keeps
+    neighbors close in memory.
+    :return: Triangle indices in RCM order
+    """
+    keys = cell_edges(triangles)
+    connectivity = EdgeConnectivity(keys.reshape(-1, 2), np.repeat(np.arange(len(triangles)), 3), len(triangles))
+    edges = connectivity.interior_edges
+    n = len(triangles)
+    adjacency = coo_matrix(
+        (np.ones(2 * len(edges)), (np.r_[edges[:, 0], edges[:, 1]], np.r_[edges[:, 1], edges[:, 0]])), shape=(n, n)
+    ).tocsr()
+    return np.asarray(reverse_cuthill_mckee(adjacency, symmetric_mode=True), dtype=np.int64)
+
+
+class Reordering:
+    def __init__(self, triangle_order, point_order) -> None:
+        """
+        Permutation applied by reorder_mesh.
+        :param triangle_order: Original row of every reordered triangle
+        :param point_order: Original index of every reordered point
+        """
+        self._triangle_order = triangle_order
+        self._point_order = point_order
+        self._triangle_inverse = np.empty_like(triangle_order)
+        self._triangle_inverse[triangle_order] = np.arange(len(triangle_order))
+
+    @property
+    def triangle_order(self):
+        return self._triangle_order
+
+    @property
+    def point_order(self):
+        return self._point_order
+
+    @property
+    def triangle_inverse(self):
+        """
+        Reordered row of every original triangle
+        """
+        return self._triangle_inverse
+
+    def original_points(self, points):
+        """
+        Put reordered point coordinates back in the original point order
+        """
+        inverse = np.empty_like(self._point_order)
+        inverse[self._point_order] = np.arange(len(self._point_order))
+        return np.asarray(points)[inverse]
+
+    def original_triangles(self, triangles):
+        """
+        Original triangles, in the original order and point numbering, from the reordered ones
+        """
+        return self._point_order[np.asarray(triangles)][self._triangle_inverse]
+
+    def to_original(self, triangle_values):
+        """
+        Put values given per reordered triangle back in the original triangle order
+        """
+        return np.asarray(triangle_values)[..., self._triangle_inverse]
+
+
+def reorder_mesh(mesh, method="rcm"):
+    """
+    Permute the triangles and points of a mesh for locality.
+    Triangles are ordered by RCM or by a Morton curve, and points by the first
+    reordered triangle that uses them.
+    :param mesh: Mesh with points and cells_dict
+    :param method: "rcm" or "morton"
+    :return: (reordered MeshData, Reordering)
+    """
+    points = np.asarray(mesh.points)
+    triangles = np.asarray(mesh.cells_dict["triangle"])
+    if method == "rcm":
+        triangle_order = rcm_order(triangles)
+    elif method == "morton":
+        triangle_order = morton_order(points[triangles, :2].mean(axis=1))
+    else:
+        raise ValueError(f"Unknown reordering '{method}', choose 'rcm' or 'morton'")
+
+    # Points in order of first use, points no triangle uses go last
+    used = triangles[triangle_order].ravel()
+    _, first_use = np.unique(used, return_index=True)
+    point_order = np.unique(used)[np.argsort(first_use, kind="stable")]
+    point_order = np.concatenate([point_order, np.setdiff1d(np.arange(len(points)), point_order)])
+    new_point_index = np.empty(len(points), dtype=np.int64)
+    new_point_index[point_order] = np.arange(len(points))
+
+    cells = {}
+    for cell_type, cell_data in mesh.cells_dict.items():
+        cell_data = np.asarray(cell_data)
+        if cell_type == "triangle":
+            cell_data = cell_data[triangle_order]
+        cells[cell_type] = new_point_index[cell_data]
+
+    return MeshData(points[point_order], cells), Reordering(triangle_order, point_order)
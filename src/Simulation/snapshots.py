@@ -0,0 +1,178 @@
+import os
+import queue
+import threading
+
+import numpy as np
+
+# Snapshots waiting for the writer thread before append blocks
+QUEUE_SIZE = 8
+
+
+def index_path(path):
+    """
+    File next to the snapshots with the step and time of every stored row
+    """
+    return f"{os.path.splitext(path)[0]}_index.npy"
+
+
+def rows_before(path, shape, time):
+    """
+    Number of leading rows of an existing snapshot file that are before time,
+    0 if there is no file or its snapshots have another shape
+    """
+    if not (os.path.exists(path) and os.path.exists(index_path(path))):
+        return 0
+    if np.load(path, mmap_mode="r").shape[1:] != tuple(shape):
+        print(f"Snapshots in {path} have another shape, starting a new file")
+        return 0
+    index = np.load(index_path(path))
+    tolerance = 1e-9 * max(1.0, abs(time))
+    before = (index[:, 0] >= 0) & (index[:, 1] < time - tolerance)
+    # Rows are written in order, the first one that is not before time ends the kept ones
+    return int(np.argmin(np.append(before, False)))
+
+
+class SnapshotWriter:
+    def __init__(self, path, n_snapshots, shape, queue_size=QUEUE_SIZE, keep_before=None) -> None:
+        """
+        Appends snapshots of the oil to a preallocated memory mapped .npy file
+        of shape (n_snapshots, *shape). The rows are copied into the map by a
+        background thread, so the solver only waits when queue_size snapshots
+        are still waiting to be written.
+        :param path: .npy file, the step and time of every row go to index_path(path)
+        :param n_snapshots: Number of rows to preallocate
+        :param shape: Shape of one snapshot, (number of triangles,) or (number of triangles, number of members)
+        :param keep_before: Time of a restart. The rows of an existing file before it are
+                            kept and n_snapshots rows are added after them.
+        """
+        self._path = path
+        kept = rows_before(path, shape, keep_before) if keep_before is not None else 0
+        rows = kept + n_snapshots
+        if kept:
+            previous_data = np.load(path, mmap_mode="r")
+            previous_index = np.load(index_path(path))
+        # Written next to the old files and renamed, the old rows are read until then
+        temporary = f"{path}.{os.getpid()}.tmp"
+        self._data = np.lib.format.open_memmap(temporary, mode="w+", dtype=float, shape=(rows, *shape))
+        # Step and time of every row, rows that are not written keep step -1
+        self._index = np.lib.format.open_memmap(f"{temporary}_index", mode="w+", dtype=float, shape=(rows, 2))
+        self._index[:] = -1
+        if kept:
+            self._data[:kept] = previous_data[:kept]
+            self._index[:kept] = previous_index[:kept]
+            del previous_data
+        os.replace(temporary, path)
+        os.replace(f"{temporary}_index", index_path(path))
+        self._count = kept
+        self._error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._write_rows, daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def count(self):
+        """
+        Number of snapshots stored so far, with the rows kept from before a restart
+        """
+        return self._count
+
+    def append(self, oil, step, time):
+        """
+        Queue a copy of oil as the next row
+        :param step: Configured step of the snapshot
+        :param time: Simulation time of the snapshot
+        """
+        self._raise_error()
+        if self._count == len(self._data):
+            raise ValueError(f"{self._path} is full with {self._count} snapshots")
+        self._queue.put((self._count, np.array(oil, dtype=float), step, time))
+        self._count += 1
+
+    def close(self):
+        """
+        Wait for the queued rows, flush the files and raise any error of the writer thread
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._data.flush()
+        self._index.flush()
+        self._raise_error()
+
+    def _write_rows(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # After an error the rest is only drained, so append never blocks on a full queue
+            if self._error is not None:
+                continue
+            row, oil, step, time = item
+            try:
+                self._data[row] = oil
+                self._index[row] = step, time
+            except Exception as e:
+                self._error = e
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError(f"Writing snapshots to {self._path} failed") from self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SnapshotReader:
+    def __init__(self, path) -> None:
+        """
+        Random access to the snapshots written by SnapshotWriter. The file is
+        memory mapped, so only the rows that are read are loaded.
+        """
+        self._data = np.load(path, mmap_mode="r")
+        index = np.load(index_path(path))
+        # Rows are written in order, the first unwritten row ends the stored ones
+        self._count = int(np.argmax(np.append(index[:, 0], -1) < 0))
+        self._steps = index[:self._count, 0].astype(int)
+        self._times = index[:self._count, 1]
+
+    @property
+    def steps(self):
+        return self._steps
+
+    @property
+    def times(self):
+        return self._times
+
+    @property
+    def shape(self):
+        """
+        Shape of one snapshot
+        """
+        return self._data.shape[1:]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, row):
+        """
+        Oil of one stored row, negative rows count from the last stored one
+        """
+        if not -self._count <= row < self._count:
+            raise IndexError(f"Snapshot {row} out of range for {self._count} snapshots")
+        return np.array(self._data[row % self._count])
+
+    def at_step(self, step):
+        """
+        Oil of the snapshot of a configured step
+        """
+        rows = np.flatnonzero(self._steps == step)
+        if len(rows) == 0:
+            raise KeyError(f"No snapshot of step {step}")
+        return self[int(rows[0])]
@@ -0,0 +1,378 @@
+from abc import ABC, abstractmethod
+from math import ceil, gcd
+
+import numpy as np
+from scipy.sparse import coo_matrix, diags
+
+
+class FaceSolver(ABC):
+    def __init__(self, arrays, delta_t=0.01) -> None:
+        """
+        Face arrays shared by the upwind and MUSCL schemes. Every face shared
+        by a triangle and another cell is stored once, so a whole time step is
+        a gather, a scatter and a reduction over flat arrays.
+        :param arrays: MeshArrays of the mesh, see Mesh.arrays
+        :param delta_t: Time step used for every update
+        """
+        self._delta_t = delta_t
+        self._n_cells = arrays.n_cells
+
+        face_owner = arrays.face_owner
+        face_neighbor = arrays.neighbor_index
+        is_triangle = arrays.is_triangle
+
+        # Faces are owned by triangles, and faces between two triangles are
+        # only stored from the lowest index
+        keep = is_triangle[face_owner] & (~is_triangle[face_neighbor] | (face_neighbor > face_owner))
+
+        self._owner = face_owner[keep].astype(np.int64)  # Triangle the normal points out of
+        self._neighbor = face_neighbor[keep].astype(np.int64)  # Cell on the other side of the face
+        self._flux_coefficient = arrays.face_coefficients[keep]
+        self._initial_oil = arrays.initial_oil.copy()
+
+        # Only triangles are updated, the other cells keep their initial oil
+        areas = arrays.areas
+        self._dt_over_area = np.zeros(self._n_cells)
+        self._dt_over_area[is_triangle] = delta_t / areas[is_triangle]
+
+    @property
+    def owner(self):
+        return self._owner
+
+    @property
+    def neighbor(self):
+        return self._neighbor
+
+    @property
+    def flux_coefficient(self):
+        """
+        Average face velocity dotted with the scaled normal of every face
+        """
+        return self._flux_coefficient
+
+    @property
+    def dt_over_area(self):
+        """
+        delta_t / area for triangles, zero for cells that are never updated
+        """
+        return self._dt_over_area
+
+    @property
+    def delta_t(self):
+        return self._delta_t
+
+    @property
+    def initial_oil(self):
+        """
+        Oil amount of every cell indexed by global cell index - 1
+        """
+        return self._initial_oil.copy()
+
+    @abstractmethod
+    def step(self, oil, out=None):
+        """
+        Advance the oil amounts of all cells one time step.
+        :param oil: Oil amount of every cell indexed by global cell index - 1
+        :param out: Optional array the result is written into, must not be oil
+        :return: Oil amounts after the step
+        """
+
+    def update(self, state):
+        """
+        Jacobi update of a shared OilState: read the current buffer, write the
+        next one and swap them.
+        :param state: OilState holding the oil of every cell
+        """
+        self.step(state.current, out=state.next)
+        state.swap()
+
+
+class UpwindSolver(FaceSolver):
+    def __init__(self, arrays, delta_t=0.01, sparse=False) -> None:
+        """
+        Face based version of the upwind scheme in Triangle.update_oil_amount.
+        :param arrays: MeshArrays of the mesh, see Mesh.arrays
+        :param delta_t: Time step used for every update
+        :param sparse: Step with the assembled transport operator instead of the face arrays
+        """
+        super().__init__(arrays, delta_t)
+        self._sparse = sparse
+        self._operator = None
+
+    @property
+    def operator(self):
+        """
+        The upwind update as a CSR matrix, so one step is oil_new = operator @ oil.
+        The velocity field is steady, so the matrix is assembled on first use only.
+        """
+        if self._operator is None:
+            self._operator = self.assemble_operator()
+        return self._operator
+
+    def assemble_operator(self):
+        """
+        Build the sparse matrix of one upwind step.
+        :return: scipy.sparse CSR matrix of shape (number of cells, number of cells)
+        """
+        outflow = self._flux_coefficient > 0
+        # Column of the upwind cell whose oil is carried across the face
+        upwind = np.where(outflow, self._owner, self._neighbor)
+        owner_weight = self._dt_over_area[self._owner] * self._flux_coefficient
+        neighbor_weight = self._dt_over_area[self._neighbor] * self._flux_coefficient
+
+        diagonal = np.arange(self._n_cells)
+        rows = np.concatenate([diagonal, self._owner, self._neighbor])
+        cols = np.concatenate([diagonal, upwind, upwind])
+        values = np.concatenate([np.ones(self._n_cells), -owner_weight, neighbor_weight])
+
+        # Duplicate entries are summed when converting to CSR
+        return coo_matrix((values, (rows, cols)), shape=(self._n_cells, self._n_cells)).tocsr()
+
+    def advance(self, oil, n_steps):
+        """
+        Apply several steps in a batch with the assembled operator.
+        :param oil: Oil amounts, either one value per cell or one column per run
+        :param n_steps: Number of steps to apply
+        :return: Oil amounts after n_steps
+        """
+        operator = self.operator
+        for _ in range(n_steps):
+            oil = operator @ oil
+        return oil
+
+    def step(self, oil, out=None):
+        """
+        Advance the oil amounts of all cells one time step.
+        :param oil: Oil amount of every cell indexed by global cell index - 1
+        :param out: Optional array the result is written into, must not be oil
+        :return: Oil amounts after the step
+        """
+        if self._sparse:
+            if out is None:
+                return self.operator @ oil
+            out[...] = self.operator @ oil
+            return out
+
+        upwind_oil = np.where(self._flux_coefficient > 0, oil[self._owner], oil[self._neighbor])
+        face_flux = self._flux_coefficient * upwind_oil
+
+        # Flux leaves the owner and enters the neighbor
+        total_flux = np.bincount(self._owner, face_flux, self._n_cells)
+        total_flux -= np.bincount(self._neighbor, face_flux, self._n_cells)
+
+        return np.subtract(oil, self._dt_over_area * total_flux, out=out)
+
+
+# Fraction of the upwind stability limit the MUSCL scheme is stable at, every
+# Runge-Kutta stage is a forward Euler step with limited face values
+MUSCL_CFL = 0.5
+
+
+class MusclSolver(FaceSolver):
+    def __init__(self, arrays, delta_t=0.01, limited=True) -> None:
+        """
+        Second order version of UpwindSolver. The oil is reconstructed
+        linearly in every triangle with a least squares gradient from the
+        neighbor midpoints, limited with the Barth-Jespersen limiter, and the
+        upwind face values are advanced with two stage SSP Runge-Kutta.
+        Cells that are not triangles keep constant values.
+        :param arrays: MeshArrays of the mesh
+        :param delta_t: Time step, at most MUSCL_CFL times stable_delta_t
+        :param limited: Apply the slope limiter, only turned off for testing
+        """
+        super().__init__(arrays, delta_t)
+        self._limited = limited
+        n_cells = self._n_cells
+        points = arrays.points
+        centroids = arrays.centroids
+        is_triangle = arrays.is_triangle
+        owner = self._owner
+        neighbor = self._neighbor
+        neighbor_is_triangle = is_triangle[neighbor]
+
+        # Face midpoints: the two corners shared with a triangle neighbor,
+        # the line midpoint for boundary cells since lines are the boundary edges
+        rows = arrays.triangle_rows
+        owner_corners = arrays.triangles[rows[owner]]
+        neighbor_corners = np.where(neighbor_is_triangle[:, None], arrays.triangles[np.maximum(rows[neighbor], 0)], -1)
+        shared = (owner_corners[:, :, None] == neighbor_corners[:, None, :]).any(axis=2)
+        face_midpoints = np.einsum("ij,ijk->ik", shared, points[owner_corners]) / 2
+        face_midpoints[~neighbor_is_triangle] = centroids[neighbor[~neighbor_is_triangle]]
+
+        # Every face seen from both sides: the cell, the cell across the face
+        # and the vector from the cell midpoint to the face midpoint
+        side_cell = np.concatenate([owner, neighbor])
+        side_other = np.concatenate([neighbor, owner])
+        side_offset = np.concatenate([face_midpoints - centroids[owner], face_midpoints - centroids[neighbor]])
+
+        # Least squares gradient: grad u_i = M_i^-1 sum_j d_ij (u_j - u_i) with M_i = sum_j d_ij d_ij^T
+        d = centroids[side_other] - centroids[side_cell]
+        m_xx, m_xy, m_yy = [np.bincount(side_cell, d[:, a] * d[:, b], n_cells) for a, b in [(0, 0), (0, 1), (1, 1)]]
+        det = m_xx * m_yy - m_xy**2
+        # Cells with fewer than two independent neighbor directions get no gradient
+        solvable = is_triangle & (det > 1e-12 * np.maximum(m_xx * m_yy, np.finfo(float).tiny))
+        safe_det = np.where(solvable, det, 1.0)[side_cell]
+        weight_x = np.where(solvable[side_cell], (m_yy[side_cell] * d[:, 0] - m_xy[side_cell] * d[:, 1]) / safe_det, 0)
+        weight_y = np.where(solvable[side_cell], (m_xx[side_cell] * d[:, 1] - m_xy[side_cell] * d[:, 0]) / safe_det, 0)
+
+        # The gradient and the unlimited change from the midpoint to every
+        # face are linear in the oil, so they are assembled as sparse matrices
+        entries = (np.concatenate([side_cell, side_cell]), np.concatenate([side_other, side_cell]))
+        self._gradient_operators = [
+            coo_matrix((np.concatenate([weight, -weight]), entries), shape=(n_cells, n_cells)).tocsr()
+            for weight in [weight_x, weight_y]
+        ]
+        self._side_change = (
+            diags(side_offset[:, 0]) @ self._gradient_operators[0][side_cell]
+            + diags(side_offset[:, 1]) @ self._gradient_operators[1][side_cell]
+        ).tocsr()
+
+        # Sides of every triangle in a (3, number of triangles) table, so the
+        # limiter takes minima and maxima over three rows. Missing sides point to
+        # an extra side with no change across the triangle itself.
+        triangle_cells = arrays.triangle_cells.astype(np.int64)
+        on_triangle = np.flatnonzero(is_triangle[side_cell])
+        on_triangle = on_triangle[np.argsort(side_cell[on_triangle], kind="stable")]
+        table_rows = rows[side_cell[on_triangle]]
+        counts = np.bincount(table_rows, minlength=len(triangle_cells))
+        columns = np.arange(len(on_triangle)) - np.repeat(np.cumsum(counts) - counts, counts)
+        self._side_table = np.full((3, len(triangle_cells)), len(side_cell))
+        self._side_table[columns, table_rows] = on_triangle
+        self._table_other = np.repeat(triangle_cells[None, :], 3, axis=0)
+        self._table_other[columns, table_rows] = side_other[on_triangle]
+        self._triangle_cells = triangle_cells
+        self._side_cell = side_cell
+        self._n_faces = len(owner)
+
+        # Sums the face fluxes into the cells: +1 for the owner, -1 for the neighbor
+        faces = np.arange(self._n_faces)
+        self._scatter = coo_matrix(
+            (np.r_[np.ones(self._n_faces), -np.ones(self._n_faces)], (side_cell, np.r_[faces, faces])),
+            shape=(n_cells, self._n_faces)
+        ).tocsr()
+
+    @property
+    def gradient_operators(self):
+        """
+        CSR matrices giving the x and y components of the least squares gradient of the oil
+        """
+        return self._gradient_operators
+
+    def gradients(self, oil):
+        """
+        Unlimited least squares gradient of the oil in every cell
+        :return: (number of cells, 2) gradients, zero for cells that are not triangles
+        """
+        return np.stack([operator @ oil for operator in self._gradient_operators], axis=1)
+
+    def face_values(self, oil):
+        """
+        Reconstructed oil on both sides of every face
+        :return: (owner side, neighbor side) values
+        """
+        change = self._side_change @ oil
+
+        if self._limited:
+            # Barth-Jespersen: the face values stay between the extremes of the cell and its neighbors
+            cells = self._triangle_cells
+            cell_oil = oil[cells]
+            neighbor_oil = oil[self._table_other]
+            room_above = np.maximum(cell_oil, neighbor_oil.max(axis=0)) - cell_oil
+            room_below = np.minimum(cell_oil, neighbor_oil.min(axis=0)) - cell_oil
+            table_change = np.concatenate([change, np.zeros((1,) + oil.shape[1:])])[self._side_table]
+            limiter = np.ones(oil.shape)
+            limiter[cells] = barth_jespersen(table_change, room_above, room_below).min(axis=0)
+            change *= limiter[self._side_cell]
+
+        values = oil[self._side_cell] + change
+        return values[:self._n_faces], values[self._n_faces:]
+
+    def residual(self, oil):
+        """
+        Net upwind flux out of every cell with the reconstructed face values
+        """
+        owner_value, neighbor_value = self.face_values(oil)
+        coefficient = columns(self._flux_coefficient, oil)
+        face_flux = coefficient * np.where(coefficient > 0, owner_value, neighbor_value)
+        # Flux leaves the owner and enters the neighbor, for every column at once
+        return self._scatter @ face_flux
+
+    def step(self, oil, out=None):
+        """
+        One SSP Runge-Kutta step: the average of the oil and two forward Euler steps.
+        :param oil: Oil of every cell, or (number of cells, number of members)
+        """
+        dt_over_area = columns(self._dt_over_area, oil)
+        stage = oil - dt_over_area * self.residual(oil)
+        stage -= dt_over_area * self.residual(stage)
+        return np.multiply(0.5, oil + stage, out=out)
+
+    def advance(self, oil, n_steps):
+        # The limited scheme is not linear, so there is no operator to batch with
+        for _ in range(n_steps):
+            oil = self.step(oil)
+        return oil
+
+
+def columns(values, oil):
+    """
+    Per cell or per face values shaped to broadcast against oil with one column per member
+    """
+    return values.reshape(values.shape + (1,) * (np.ndim(oil) - 1))
+
+
+def barth_jespersen(change, room_above, room_below):
+    """
+    Largest factor in [0, 1] the reconstructed change can be scaled by
+    without leaving [value + room_below, value + room_above]
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(change > 0, room_above, room_below) / change
+    # No change needs no limiting, this also replaces the 0 / 0 ratios
+    return np.where(change == 0, 1.0, np.minimum(1.0, ratio))
+
+
+def stable_delta_t(arrays, cfl=1.0):
+    """
+    Largest time step that keeps the upwind update stable on every triangle,
+    the area of the cell divided by the sum of its outflow coefficients.
+    :param arrays: MeshArrays of the mesh
+    :param cfl: Safety factor multiplied with the limit
+    """
+    outflow = np.bincount(arrays.face_owner, np.maximum(arrays.face_coefficients, 0), arrays.n_cells)
+    limited = arrays.is_triangle & (outflow > 0)
+    if not limited.any():
+        return np.inf
+    return cfl * np.min(arrays.areas[limited] / outflow[limited])
+
+
+def plan_time_steps(delta_t, max_delta_t, n_steps, write_frequency, start_step=0):
+    """
+    Fewest solver steps that stay below max_delta_t and still land on every
+    output time (every write_frequency configured steps) and on the end time.
+    :param delta_t: Configured time step, (tEnd - tStart) / nSteps
+    :param max_delta_t: Largest stable time step, see stable_delta_t
+    :param start_step: Configured step the run starts at, after a restart
+    :return: (merged, substeps), every solver step covers merged configured steps
+             or each configured step is split into substeps solver steps
+    """
+    if delta_t > max_delta_t:
+        return 1, ceil(delta_t / max_delta_t)
+
+    # Merged steps must divide both intervals from the start step so output and end times are hit exactly
+    common = gcd(n_steps - start_step, write_frequency)
+    merged = max(m for m in range(1, common + 1) if common % m == 0 and m * delta_t <= max_delta_t)
+    return merged, 1
+
+
+def report_time_steps(n_steps, delta_t, max_delta_t, merged, substeps, start_step=0):
+    """
+    Print when the configured nSteps is unstable or takes more steps than needed
+    :param start_step: Configured step the run starts at, after a restart only the rest is taken
+    """
+    if substeps > 1:
+        print(f"nSteps = {n_steps} is unstable on this mesh: delta_t = {delta_t:.3g} is above "
+              f"the stable limit {max_delta_t:.3g}. Taking {substeps} sub-steps per step.")
+    elif merged > 1:
+        print(f"nSteps = {n_steps} over-resolves time: delta_t = {delta_t:.3g} is below "
+              f"the stable limit {max_delta_t:.3g}. Taking {(n_steps - start_step) // merged} steps instead.")
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+class OilState:
+    def __init__(self, initial_oil) -> None:
+        """
+        Oil amount of every cell in one contiguous array, indexed by global
+        cell index - 1, plus a second buffer the next step is written into.
+        :param initial_oil: Oil amount of every cell at the start time, or
+                            (number of cells, number of members) for an ensemble
+        """
+        self._current = np.array(initial_oil, dtype=float)
+        # Cells that are never updated keep the same value in both buffers
+        self._next = self._current.copy()
+
+    @property
+    def current(self):
+        return self._current
+
+    @property
+    def next(self):
+        return self._next
+
+    def swap(self):
+        """
+        Make the next buffer the current one after every cell has been updated
+        """
+        self._current, self._next = self._next, self._current
+
+    def load(self, oil):
+        """
+        Set the oil of every cell in both buffers, for example from a checkpoint
+        :param oil: Array with the same shape as current
+        """
+        oil = np.asarray(oil, dtype=float)
+        if oil.shape != self._current.shape:
+            raise ValueError(f"Oil of shape {oil.shape} does not match the state of shape {self._current.shape}")
+        self._current[...] = oil
+        self._next[...] = oil
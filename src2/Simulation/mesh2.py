@@ -1,6 +1,8 @@
 import meshio
 import numpy as np
 
+from src.Simulation.connectivity import EdgeConnectivity, cell_edges
+
 from .cells2 import Line, Triangle, Vertex
 from .solver2 import CellFactory
 
@@ -34,9 +36,23 @@ class Mesh:
 
     def computeNeighbors(self):
         """
-        Calls computeNeighbors function for every cell
+        Finds the neighbors of every cell with one sort over all edges,
+        instead of calling computeNeighbors on every cell
         """
-        [cell.computeNeighbors(self._cells) for cell in self._cells]
+        face_keys = []
+        face_cells = []
+        first = 0
+        for cellForType in self._msh.cells:
+            keys = cell_edges(cellForType.data)
+            face_keys.append(keys.reshape(-1, 2))
+            face_cells.append(np.repeat(first + np.arange(len(cellForType.data)), keys.shape[1]))
+            first += len(cellForType.data)
+
+        connectivity = EdgeConnectivity(
+            np.concatenate(face_keys), np.concatenate(face_cells), len(self._cells)
+        )
+        for cell in self._cells:
+            cell._neighbors = connectivity.neighbors(cell._idx).tolist()
 
     @property
     def coordinates(self):
@@ -0,0 +1,108 @@
+import meshio
+import numpy as np
+import pytest
+
+from src.Simulation import backends
+from src.Simulation.backends import create_backend
+from src.Simulation.gmsh_reader import MeshData
+from src.Simulation.mesh import Mesh
+from src.Simulation.state import OilState
+
+
+def run_backend(mesh_name, key, n_steps=5):
+    mesh = Mesh(meshio.read(mesh_name))
+    mesh.compute_arrays()
+    backend = create_backend(key, mesh)
+    state = mesh.state
+    for _ in range(n_steps):
+        backend.update(state)
+    return state.current
+
+
+@pytest.mark.parametrize("mesh_name", ["simple.msh", "bay.msh"])
+@pytest.mark.parametrize("key", ["object", "sparse", "numba", "threads", "processes"])
+def test_backends_match_numpy(mesh_name, key):
+    if key == "numba":
+        pytest.importorskip("numba")
+    assert np.allclose(run_backend(mesh_name, key), run_backend(mesh_name, "numpy"))
+
+
+def test_unknown_backend_raises():
+    mesh = Mesh(meshio.read("simple.msh"))
+    mesh.compute_arrays()
+    with pytest.raises(ValueError):
+        create_backend("fortran", mesh)
+
+
+def test_numba_falls_back_to_numpy(monkeypatch):
+    monkeypatch.setattr(backends, "HAS_NUMBA", False)
+    mesh = Mesh(meshio.read("simple.msh"))
+    mesh.compute_arrays()
+    assert isinstance(create_backend("numba", mesh), backends.NumpyBackend)
+
+
+@pytest.mark.parametrize("mesh_name", ["simple.msh", "bay.msh"])
+@pytest.mark.parametrize("threads", [1, 4])
+def test_threads_bit_identical_to_numpy(mesh_name, threads):
+    mesh = Mesh(meshio.read(mesh_name))
+    mesh.compute_arrays()
+    serial = create_backend("numpy", mesh)
+    threaded = create_backend("threads", mesh, threads=threads)
+
+    serial_state = mesh.state
+    threaded_state = OilState(serial_state.current)
+    for _ in range(5):
+        serial.update(serial_state)
+        threaded.update(threaded_state)
+    threaded.close()
+
+    assert np.array_equal(serial_state.current, threaded_state.current)
+
+
+def test_threads_with_isolated_triangle_at_chunk_end():
+    # Three connected triangles, the last one with two faces, then one that shares no edge and has no faces
+    points = np.array([[0.3, 0.3, 0], [0.5, 0.3, 0], [0.4, 0.5, 0], [0.6, 0.5, 0], [0.2, 0.5, 0],
+                       [0.8, 0.8, 0], [0.9, 0.8, 0], [0.85, 0.9, 0]])
+    triangles = np.array([[1, 3, 2], [0, 2, 4], [0, 1, 2], [5, 6, 7]])
+    results = []
+    for key, options in [("numpy", {}), ("threads", {"threads": 1}), ("threads", {"threads": 2})]:
+        mesh = Mesh(MeshData(points, {"triangle": triangles}), x_star=[0.4, 0.4])
+        mesh.compute_arrays()
+        backend = create_backend(key, mesh, 0.01, **options)
+        state = mesh.state
+        for _ in range(3):
+            backend.update(state)
+        backend.close()
+        results.append(state.current.copy())
+
+    assert not np.allclose(results[0], mesh.arrays.initial_oil)
+    assert np.array_equal(results[1], results[0])
+    assert np.array_equal(results[2], results[0])
+
+
+@pytest.mark.parametrize("scheme", ["upwind", "muscl"])
+def test_ensemble_matches_single_runs(scheme):
+    x_stars = [[0.35, 0.45], [0.5, 0.3], [0.2, 0.6]]
+    amplitudes = [1.0, 0.5, 2.0]
+    mesh = Mesh(meshio.read("bay.msh"))
+    mesh.compute_arrays()
+    mesh.ensemble_state(x_stars, amplitudes)
+    backend = create_backend("numpy", mesh, 0.05, scheme=scheme, ensemble=True)
+    ensemble = mesh.state
+    backend.advance(ensemble, 5)
+    assert ensemble.current.shape == (mesh.arrays.n_cells, 3)
+
+    for member, (x_star, amplitude) in enumerate(zip(x_stars, amplitudes)):
+        single = Mesh(meshio.read("bay.msh"), x_star)
+        single.compute_arrays()
+        backend = create_backend("numpy", single, 0.05, scheme=scheme)
+        backend.advance(single.state, 5)
+        # Both schemes scale with the amplitude
+        assert np.allclose(ensemble.current[:, member], amplitude * single.state.current)
+
+
+def test_ensemble_needs_an_amplitude_per_member():
+    mesh = Mesh(meshio.read("simple.msh"))
+    mesh.compute_arrays()
+    with pytest.raises(ValueError):
+        mesh.ensemble_state([[0.35, 0.45], [0.5, 0.3]], [1.0])
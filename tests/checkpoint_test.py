@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pytest
+import toml
+
+import maintest
+from src.Simulation.atomic import write_atomic
+from src.Simulation.checkpoint import Checkpoint, load_checkpoint, mesh_hash, restart_step, save_checkpoint
+
+
+def final_oil(output_dir):
+    return np.array(toml.load(os.path.join(output_dir, "simulation_results.toml"))["final_oil_amounts"])
+
+
+def test_checkpoint_round_trip(tmp_path, simple_arrays):
+    path = str(tmp_path / "checkpoint.npz")
+    oil = simple_arrays.initial_oil
+    save_checkpoint(path, Checkpoint(oil, 0.25, 5, mesh_hash(simple_arrays)))
+
+    checkpoint = load_checkpoint(path, mesh_hash(simple_arrays))
+    assert np.array_equal(checkpoint.oil, oil)
+    assert checkpoint.time == 0.25 and checkpoint.step == 5
+    # Only the checkpoint itself is left, the temporary file was renamed
+    assert os.listdir(tmp_path) == ["checkpoint.npz"]
+    with pytest.raises(ValueError):
+        load_checkpoint(path, "another mesh")
+
+
+def test_restart_step():
+    checkpoint = Checkpoint(np.zeros(1), 0.1 + 3 * 0.05, 3, "")
+    assert restart_step(checkpoint, 0.1, 0.05, 10) == 3
+    assert restart_step(checkpoint, 0.25, 0.01, 10) == 0
+    with pytest.raises(ValueError):
+        restart_step(checkpoint, 0.1, 0.04, 10)  # Between two steps
+    with pytest.raises(ValueError):
+        restart_step(checkpoint, 0.1, 0.05, 2)  # After the end of the run
+
+
+def test_restart_continues_to_later_end_time(tmp_path, write_config):
+    full = tmp_path / "full"
+    first = tmp_path / "first"
+    second = tmp_path / "second"
+    for output_dir in [full, first, second]:
+        os.makedirs(output_dir / "plots")
+
+    maintest.run_simulation(write_config(tmp_path / "full.toml"), str(full), render=False)
+    maintest.run_simulation(write_config(tmp_path / "first.toml", 2, 0.1), str(first), render=False)
+    config = write_config(tmp_path / "second.toml", 2, 0.2, t_start=0.1,
+                          io={"restartFile": str(first / "checkpoint.npz")})
+    maintest.run_simulation(config, str(second), render=False)
+
+    assert np.allclose(final_oil(second), final_oil(full))
+    assert toml.load(second / "simulation_results.toml")["restart"]["step"] == 0
+
+
+def test_resume_stopped_run(tmp_path, write_config):
+    full = tmp_path / "full"
+    stopped = tmp_path / "stopped"
+    resumed = tmp_path / "resumed"
+    for output_dir in [full, stopped, resumed]:
+        os.makedirs(output_dir / "plots")
+
+    maintest.run_simulation(write_config(tmp_path / "full.toml"), str(full), render=False)
+    # A run that stopped at half time, the same run resumes from its checkpoint
+    maintest.run_simulation(write_config(tmp_path / "stopped.toml", 2, 0.1), str(stopped), render=False)
+    config = write_config(tmp_path / "resumed.toml", io={"restartFile": str(stopped / "checkpoint.npz")})
+    maintest.run_simulation(config, str(resumed), render=False)
+
+    assert np.allclose(final_oil(resumed), final_oil(full))
+    assert toml.load(resumed / "simulation_results.toml")["restart"]["step"] == 2
+
+
+def test_resume_at_odd_step_reaches_end_time(tmp_path, write_config):
+    stopped = tmp_path / "stopped"
+    resumed = tmp_path / "resumed"
+    for output_dir in [stopped, resumed]:
+        os.makedirs(output_dir / "plots")
+
+    # Stops at step 5 of 20, the uninterrupted run would merge pairs of steps on bay.msh
+    config = write_config(tmp_path / "stopped.toml", 5, 0.25, mesh_name="bay.msh", io={"writeFrequency": 5})
+    maintest.run_simulation(config, str(stopped), render=False)
+    config = write_config(tmp_path / "resumed.toml", 20, 1.0, mesh_name="bay.msh",
+                          io={"restartFile": str(stopped / "checkpoint.npz"), "writeFrequency": 10})
+    maintest.run_simulation(config, str(resumed), render=False)
+
+    parameters = toml.load(resumed / "simulation_results.toml")["simulation_parameters"]
+    assert np.isclose(parameters["solver_steps"] * parameters["solver_delta_t"], 0.75)
+    checkpoint = load_checkpoint(str(resumed / "checkpoint.npz"))
+    assert checkpoint.time == pytest.approx(1.0) and checkpoint.step == 20
+
+
+def test_periodic_checkpoints(tmp_path, monkeypatch, write_config):
+    os.makedirs(tmp_path / "plots")
+    written = []
+
+    def record(path, checkpoint):
+        written.append(checkpoint.step)
+
+    monkeypatch.setattr(maintest, "save_checkpoint", record)
+    config = write_config(tmp_path / "periodic.toml", 8, 0.4, io={"checkpointFrequency": 4})
+    maintest.run_simulation(config, str(tmp_path), render=False)
+    assert written == [4, 8]
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "file.bin")
+    write_atomic(path, lambda f: f.write(b"old"))
+
+    def fail(f):
+        f.write(b"half")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        write_atomic(path, fail)
+    assert os.listdir(tmp_path) == ["file.bin"]
+    assert open(path, "rb").read() == b"old"
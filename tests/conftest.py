@@ -0,0 +1,39 @@
+import os
+
+import meshio
+import pytest
+import toml
+
+from src.Simulation.mesh import Mesh
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def simple_arrays():
+    return Mesh(meshio.read(os.path.join(ROOT, "simple.msh"))).compute_arrays()
+
+
+@pytest.fixture(scope="session")
+def bay_arrays():
+    return Mesh(meshio.read(os.path.join(ROOT, "bay.msh"))).compute_arrays()
+
+
+@pytest.fixture
+def write_config():
+    """
+    Write a configuration for maintest.run_simulation and return its path.
+    Relative mesh names are looked up in the repository root. The mesh cache
+    is off, so runs do not write .mesh_cache/ next to the meshes in the repository.
+    """
+    def write(path, n_steps=4, t_end=0.2, t_start=0.0, mesh_name="simple.msh", settings=None, geometry=None,
+              io=None):
+        config = {
+            "settings": {"nSteps": n_steps, "tStart": t_start, "tEnd": t_end, "meshCache": False, **(settings or {})},
+            "geometry": {"meshName": os.path.join(ROOT, mesh_name), **(geometry or {})},
+            "IO": {"writeFrequency": 2, **(io or {})},
+        }
+        path.write_text(toml.dumps(config))
+        return str(path)
+
+    return write
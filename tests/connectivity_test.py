@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from src.Simulation.connectivity import EdgeConnectivity, cell_edges
+from src2.Simulation.cells2 import Cell
+from src2.Simulation.mesh2 import Mesh
+
+
+@pytest.fixture
+def two_triangles():
+    triangles = np.array([[0, 1, 2], [1, 3, 2]])
+    keys = cell_edges(triangles)
+    return EdgeConnectivity(keys.reshape(-1, 2), np.repeat([0, 1], 3), 2)
+
+
+def test_cell_edges_are_sorted():
+    assert cell_edges([[2, 0, 1]]).tolist() == [[[0, 2], [0, 1], [1, 2]]]
+    assert cell_edges([[5, 3]]).tolist() == [[[3, 5]]]
+
+
+def test_interior_and_boundary_edges(two_triangles):
+    assert two_triangles.interior_edges.tolist() == [[0, 1]]
+    assert len(two_triangles.boundary_edges) == 4
+    assert sorted(map(tuple, two_triangles.boundary_edges.tolist())) == [(0, 1), (0, 2), (1, 3), (2, 3)]
+
+
+def test_neighbor_csr(two_triangles):
+    assert two_triangles.neighbor_ptr.tolist() == [0, 1, 2]
+    assert two_triangles.neighbors(0).tolist() == [1]
+    assert two_triangles.neighbors(1).tolist() == [0]
+
+
+def test_src2_neighbors_match_per_cell_search():
+    mesh = Mesh("simple.msh")
+    mesh.computeNeighbors()
+    for cell in mesh.cells[::25]:
+        expected = Cell(cell._pointIds, cell._idx, mesh.coordinates)
+        expected.computeNeighbors(mesh.cells)
+        assert sorted(cell._neighbors) == sorted(expected._neighbors)
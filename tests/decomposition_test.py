@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from src.Simulation.decomposition import DomainDecomposition, recursive_coordinate_bisection
+from src.Simulation.solver import UpwindSolver
+
+
+@pytest.mark.parametrize("n_parts", [1, 2, 3, 4])
+def test_bisection_is_balanced(simple_arrays, n_parts):
+    parts = recursive_coordinate_bisection(simple_arrays.centroids[simple_arrays.triangle_cells], n_parts)
+    counts = np.bincount(parts, minlength=n_parts)
+    assert len(counts) == n_parts
+    assert counts.max() - counts.min() <= 1
+
+
+def test_decomposition_matches_serial(simple_arrays):
+    solver = UpwindSolver(simple_arrays, 0.01)
+    expected = solver.advance(simple_arrays.initial_oil, 7)
+
+    decomposition = DomainDecomposition(simple_arrays, 0.01, 3)
+    try:
+        oil = decomposition.advance(simple_arrays.initial_oil, 4)
+        oil = decomposition.advance(oil, 3)
+    finally:
+        decomposition.close()
+
+    assert np.allclose(oil, expected)
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+import toml
+
+import maintest
+from src.Simulation.exposure import ExposureTracker, area_cells
+
+
+BORDERS = [[0.0, 0.45], [0.0, 0.2]]
+
+
+def test_area_cells_are_triangles_inside_borders(bay_arrays):
+    cells = area_cells(bay_arrays, BORDERS)
+    x, y = bay_arrays.centroids[cells].T
+    assert len(cells) > 0
+    assert np.all(bay_arrays.is_triangle[cells])
+    assert np.all((x >= 0.0) & (x <= 0.45) & (y >= 0.0) & (y <= 0.2))
+
+    outside = np.setdiff1d(np.flatnonzero(bay_arrays.is_triangle), cells)
+    x, y = bay_arrays.centroids[outside].T
+    assert not np.any((x >= 0.0) & (x <= 0.45) & (y >= 0.0) & (y <= 0.2))
+    with pytest.raises(ValueError):
+        area_cells(bay_arrays, [[0.45, 0.0], [0.0, 0.2]])
+
+
+def test_totals_and_first_arrival(bay_arrays):
+    cells = area_cells(bay_arrays, BORDERS)
+    area = bay_arrays.areas[cells].sum()
+    tracker = ExposureTracker(bay_arrays, BORDERS, threshold=1.5 * area)
+    for time, level in [(0.0, 0.0), (0.1, 1.0), (0.2, 2.0), (0.3, 1.0)]:
+        oil = np.zeros(bay_arrays.n_cells)
+        oil[cells] = level
+        tracker.record(time, oil)
+
+    assert np.allclose(tracker.totals, [0.0, area, 2 * area, area])
+    assert tracker.first_arrival() == 0.2
+
+
+def test_first_arrival_of_every_member(bay_arrays):
+    tracker = ExposureTracker(bay_arrays, BORDERS, threshold=0.0)
+    oil = np.zeros((bay_arrays.n_cells, 2))
+    tracker.record(0.0, oil)
+    oil[tracker.cells[0], 1] = 1.0
+    tracker.record(0.1, oil)
+
+    assert tracker.totals.shape == (2, 2)
+    arrival = tracker.first_arrival()
+    assert np.isnan(arrival[0]) and arrival[1] == 0.1
+
+
+def test_run_writes_exposure(tmp_path, write_config):
+    os.makedirs(tmp_path / "plots")
+    config = write_config(tmp_path / "fish.toml", mesh_name="bay.msh", settings={"backend": "sparse"},
+                          geometry={"borders": [[0.3, 0.5], [0.3, 0.5]], "arrivalThreshold": 1e-4})
+    maintest.run_simulation(config, str(tmp_path), render=False)
+    results = toml.load(tmp_path / "simulation_results.toml")
+    exposure = results["exposure"]
+
+    solver_steps = results["simulation_parameters"]["solver_steps"]
+    assert len(exposure["times"]) == len(exposure["oil"]) == solver_steps + 1
+    assert np.isclose(exposure["times"][-1], 0.2)
+    # The spill starts in the area, so the oil has arrived at the start
+    assert exposure["first_arrival"] == 0.0
+    assert exposure["max_oil"] == max(exposure["oil"])
@@ -0,0 +1,114 @@
+import meshio
+import numpy as np
+import pytest
+
+from src.Simulation.gmsh_reader import MeshData, is_gmsh41, read_gmsh41, read_mesh
+
+
+def assert_same_mesh(expected, actual):
+    assert np.array_equal(expected.points, actual.points)
+    assert list(expected.cells_dict) == list(actual.cells_dict)
+    for cell_type, cell_data in expected.cells_dict.items():
+        assert np.array_equal(cell_data, actual.cells_dict[cell_type])
+
+
+def test_reads_bay_like_meshio():
+    assert is_gmsh41("bay.msh")
+    assert_same_mesh(meshio.read("bay.msh"), read_gmsh41("bay.msh"))
+
+
+def test_other_formats_fall_back_to_meshio():
+    assert not is_gmsh41("simple.msh")
+    msh = read_mesh("simple.msh")
+    assert not isinstance(msh, MeshData)
+    assert_same_mesh(meshio.read("simple.msh"), msh)
+    with pytest.raises(ValueError):
+        read_gmsh41("simple.msh")
+
+
+def test_blocks_tags_and_chunks(tmp_path, monkeypatch):
+    # Two node blocks with unordered, non-contiguous tags and a parametric block
+    path = tmp_path / "small.msh"
+    path.write_text("""$MeshFormat
+4.1 0 8
+$EndMeshFormat
+$Nodes
+2 4 3 20
+0 1 0 2
+20
+3
+0 0 0
+1 0 0
+1 2 1 2
+7
+5
+0 1 0 0.5
+1 1 0 0.25
+$EndNodes
+$Elements
+3 4 1 4
+0 1 15 1
+1 20
+1 1 1 1
+2 20 3
+2 1 2 2
+3 20 3 7
+4 3 5 7
+$EndElements
+""")
+    monkeypatch.setattr("src.Simulation.gmsh_reader.CHUNK_LINES", 1)
+    msh = read_mesh(str(path))
+
+    assert np.array_equal(msh.points, [[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]])
+    assert list(msh.cells_dict) == ["vertex", "line", "triangle"]
+    assert np.array_equal(msh.cells_dict["vertex"], [[0]])
+    assert np.array_equal(msh.cells_dict["line"], [[0, 1]])
+    assert np.array_equal(msh.cells_dict["triangle"], [[0, 1, 2], [1, 3, 2]])
+
+
+def test_crlf_line_endings(tmp_path):
+    path = tmp_path / "crlf.msh"
+    path.write_bytes(open("bay.msh", "rb").read().replace(b"\r\n", b"\n").replace(b"\n", b"\r\n"))
+    assert is_gmsh41(str(path))
+    assert_same_mesh(meshio.read("bay.msh"), read_gmsh41(str(path)))
+
+
+def test_unsupported_elements_fall_back_to_meshio(tmp_path):
+    # A quadratic quadrangle (type 10) is not in ELEMENT_TYPES
+    path = tmp_path / "quad9.msh"
+    path.write_text("""$MeshFormat
+4.1 0 8
+$EndMeshFormat
+$Nodes
+1 9 1 9
+2 1 0 9
+1
+2
+3
+4
+5
+6
+7
+8
+9
+0 0 0
+1 0 0
+1 1 0
+0 1 0
+0.5 0 0
+1 0.5 0
+0.5 1 0
+0 0.5 0
+0.5 0.5 0
+$EndNodes
+$Elements
+1 1 1 1
+2 1 10 1
+1 1 2 3 4 5 6 7 8 9
+$EndElements
+""")
+    with pytest.raises(ValueError):
+        read_gmsh41(str(path))
+    msh = read_mesh(str(path))
+    assert not isinstance(msh, MeshData)
+    assert_same_mesh(meshio.read(str(path)), msh)
@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+
+import pytest
+
+import maintest
+from src.Simulation.snapshots import SnapshotReader
+
+
+@pytest.fixture
+def sweep(tmp_path, monkeypatch, write_config):
+    configs = tmp_path / "configs"
+    configs.mkdir()
+    io = {"logName": "run"}
+    write_config(configs / "a.toml", io=io)
+    write_config(configs / "b.toml", 6, io=io)
+    write_config(configs / "broken.toml", mesh_name=str(tmp_path / "missing.msh"), io=io)
+    monkeypatch.chdir(tmp_path)
+    return configs
+
+
+def test_jobs_run_configs_in_parallel_with_logs(sweep, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["maintest.py", "-f", str(sweep), "--jobs", "2"])
+    maintest.main()
+    output = capsys.readouterr().out
+
+    for name in ["a", "b"]:
+        results = tmp_path / "results" / name
+        assert (results / "simulation_results.toml").exists()
+        assert (results / "plots" / "step_0000.png").exists()
+        assert "Simulation complete" in (results / "run.log").read_text()
+    assert "Traceback" in (tmp_path / "results" / "broken" / "run.log").read_text()
+
+    # The summary lists every config with its outcome
+    summary = output[output.index("Config"):]
+    assert "a.toml" in summary and "b.toml" in summary
+    assert "broken.toml" in summary and "failed" in summary
+    assert "2 succeeded, 1 failed" in summary
+
+
+def test_serial_run_prints_summary(sweep, monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["maintest.py", "-f", str(sweep)])
+    maintest.main()
+    assert "2 succeeded, 1 failed" in capsys.readouterr().out
+
+
+def test_frames_stream_to_video_without_plots(tmp_path, monkeypatch, write_config):
+    config = write_config(tmp_path / "video.toml", io={"writePlots": False})
+    os.makedirs(tmp_path / "plots")
+
+    maintest.run_simulation(config, str(tmp_path))
+    assert (tmp_path / "simulation.mp4").stat().st_size > 0
+    assert os.listdir(tmp_path / "plots") == []
+
+
+def test_failed_run_stops_backend_workers(tmp_path, write_config):
+    config = write_config(tmp_path / "failing.toml", settings={"backend": "processes", "processes": 2},
+                          io={"renderWorkers": 0})
+
+    # The plots directory is missing, so saving the first frame fails
+    children = set(multiprocessing.active_children())
+    with pytest.raises(OSError):
+        maintest.run_simulation(config, str(tmp_path))
+    assert set(multiprocessing.active_children()) <= children
+
+
+def test_failed_run_closes_frames_and_snapshots(tmp_path, monkeypatch, capsys, write_config):
+    config = write_config(tmp_path / "failing.toml")
+
+    def disk_full(path, checkpoint):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(maintest, "save_checkpoint", disk_full)
+    # The plots directory is missing as well, so closing the frames fails too
+    children = set(multiprocessing.active_children())
+    with pytest.raises(OSError, match="disk full"):
+        maintest.run_simulation(config, str(tmp_path))
+
+    assert set(multiprocessing.active_children()) <= children
+    assert "Error closing FramePool" in capsys.readouterr().out
+    # The snapshots appended before the failure are flushed
+    assert len(SnapshotReader(str(tmp_path / "snapshots.npy"))) == 2
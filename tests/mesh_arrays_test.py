@@ -0,0 +1,61 @@
+import meshio
+import numpy as np
+import pytest
+
+from src.Simulation.mesh import Mesh
+
+
+@pytest.fixture(scope="module")
+def simple_mesh():
+    mesh = Mesh(meshio.read("simple.msh"))
+    final_cell_data, cell_type_mapping = mesh.main_function()
+    return mesh, final_cell_data, cell_type_mapping
+
+
+def test_global_index_matches_mapping(simple_mesh):
+    mesh, _, cell_type_mapping = simple_mesh
+    for (cell_type, local_index), global_index in cell_type_mapping.items():
+        assert mesh.arrays.global_index(cell_type, local_index) == global_index
+
+
+def test_arrays_match_cell_data(simple_mesh):
+    mesh, final_cell_data, _ = simple_mesh
+    arrays = mesh.arrays
+    for global_index, cell_data in final_cell_data.items():
+        row = global_index - 1
+        assert arrays.areas[row] == cell_data['area']
+        assert arrays.initial_oil[row] == cell_data['oil_amount']
+
+        faces = slice(arrays.neighbor_ptr[row], arrays.neighbor_ptr[row + 1])
+        neighbors = [neighbor for neighbor, _, _ in cell_data['face_table']]
+        coefficients = [coefficient for _, _, coefficient in cell_data['face_table']]
+        assert (arrays.neighbor_index[faces] + 1).tolist() == neighbors
+        assert np.array_equal(arrays.face_coefficients[faces], coefficients)
+
+
+def test_triangle_rows_round_trip(simple_mesh):
+    mesh, _, _ = simple_mesh
+    arrays = mesh.arrays
+    assert np.array_equal(arrays.triangle_rows[arrays.triangle_cells], np.arange(len(arrays.triangles)))
+    assert np.array_equal(arrays.triangles, mesh._mesh.cells_dict["triangle"])
+
+
+@pytest.mark.parametrize("mesh_name", ["simple.msh", "bay.msh"])
+def test_compute_arrays_matches_main_function(mesh_name):
+    mesh = Mesh(meshio.read(mesh_name))
+    mesh.main_function()
+    expected = mesh.arrays
+    arrays = Mesh(meshio.read(mesh_name)).compute_arrays()
+
+    assert arrays.type_offsets == expected.type_offsets
+    assert np.array_equal(arrays.triangles, expected.triangles)
+    assert np.array_equal(arrays.triangle_cells, expected.triangle_cells)
+    assert np.array_equal(arrays.neighbor_ptr, expected.neighbor_ptr)
+    assert np.array_equal(arrays.neighbor_index, expected.neighbor_index)
+    for name in ["centroids", "areas", "initial_oil", "face_coefficients"]:
+        assert np.allclose(getattr(arrays, name), getattr(expected, name)), name
+
+
+def test_arrays_use_tens_of_bytes_per_cell():
+    arrays = Mesh(meshio.read("bay.msh")).compute_arrays()
+    assert arrays.nbytes() / arrays.n_cells < 100
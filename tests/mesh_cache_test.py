@@ -0,0 +1,86 @@
+import os
+import shutil
+
+import meshio
+import numpy as np
+import pytest
+
+from src.Simulation import mesh_cache
+from src.Simulation.mesh import Mesh
+from src.Simulation.mesh_cache import cache_key, load_mesh
+
+
+@pytest.fixture
+def mesh_file(tmp_path):
+    path = tmp_path / "bay.msh"
+    shutil.copy("bay.msh", path)
+    return str(path)
+
+
+def cache_files(mesh_file):
+    cache_dir = os.path.join(os.path.dirname(mesh_file), ".mesh_cache")
+    return sorted(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else []
+
+
+def test_second_load_reads_cache(mesh_file, monkeypatch):
+    mesh, _ = load_mesh(mesh_file)
+    assert len(cache_files(mesh_file)) == 1
+
+    def no_parsing(*args, **kwargs):
+        raise AssertionError("the mesh file was parsed again")
+
+    monkeypatch.setattr(mesh_cache, "read_mesh", no_parsing)
+    cached, reordering = load_mesh(mesh_file)
+
+    assert reordering is None
+    for field in mesh_cache.ARRAY_FIELDS + ["points", "initial_oil"]:
+        assert np.array_equal(getattr(cached.arrays, field), getattr(mesh.arrays, field))
+    assert cached.arrays.type_offsets == mesh.arrays.type_offsets
+    assert np.array_equal(cached.state.current, mesh.state.current)
+
+
+def test_cached_mesh_matches_compute_arrays(mesh_file):
+    load_mesh(mesh_file)
+    cached, _ = load_mesh(mesh_file, x_star=[0.5, 0.3])
+    fresh = Mesh(meshio.read(mesh_file), [0.5, 0.3])
+    fresh.compute_arrays()
+
+    # The initial oil follows xStar even though it is not stored in the cache
+    assert np.allclose(cached.arrays.initial_oil, fresh.arrays.initial_oil)
+    assert np.allclose(cached.arrays.face_coefficients, fresh.arrays.face_coefficients)
+    # The cell objects can still be created from the cached mesh
+    cached.main_function()
+    assert len(cached._cells) == fresh.arrays.n_cells
+
+
+def test_changed_mesh_rebuilds_cache(mesh_file):
+    first, _ = load_mesh(mesh_file)
+    key = cache_key(mesh_file)
+
+    # Move one point slightly
+    with open(mesh_file) as f:
+        text = f.read()
+    msh = meshio.read(mesh_file)
+    msh.points[0, 0] += 1e-3
+    meshio.write(mesh_file, msh, file_format="gmsh22", binary=False)
+    assert text != open(mesh_file).read()
+
+    second, _ = load_mesh(mesh_file)
+    assert cache_key(mesh_file) != key
+    assert len(cache_files(mesh_file)) == 2
+    assert not np.allclose(second.arrays.points, first.arrays.points)
+
+
+def test_reordered_mesh_is_cached_separately(mesh_file):
+    original, _ = load_mesh(mesh_file)
+    load_mesh(mesh_file, reorder="rcm")
+    reordered, reordering = load_mesh(mesh_file, reorder="rcm")
+
+    assert len(cache_files(mesh_file)) == 2
+    assert np.array_equal(reordering.original_triangles(reordered.arrays.triangles), original.arrays.triangles)
+    assert np.array_equal(reordering.original_points(reordered.arrays.points), original.arrays.points)
+
+
+def test_cache_can_be_turned_off(mesh_file):
+    load_mesh(mesh_file, cache=False)
+    assert cache_files(mesh_file) == []
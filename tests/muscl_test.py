@@ -0,0 +1,77 @@
+import meshio
+import numpy as np
+import pytest
+
+from src.Simulation import backends
+from src.Simulation.backends import create_backend
+from src.Simulation.mesh import Mesh
+from src.Simulation.solver import MUSCL_CFL, FaceSolver, MusclSolver, UpwindSolver, stable_delta_t
+
+
+def test_gradient_exact_for_linear_oil(bay_arrays):
+    solver = MusclSolver(bay_arrays, limited=False)
+    oil = 2 * bay_arrays.centroids[:, 0] - 3 * bay_arrays.centroids[:, 1]
+    gradient = solver.gradients(oil)
+
+    assert np.allclose(gradient[bay_arrays.is_triangle], [2, -3])
+    assert np.all(gradient[~bay_arrays.is_triangle] == 0)
+
+
+def test_limited_face_values_stay_within_neighbors(bay_arrays):
+    solver = MusclSolver(bay_arrays)
+    oil = solver.initial_oil
+    owner_value, neighbor_value = solver.face_values(oil)
+
+    highest = oil.copy()
+    lowest = oil.copy()
+    for cell, other in [(solver.owner, solver.neighbor), (solver.neighbor, solver.owner)]:
+        np.maximum.at(highest, cell, oil[other])
+        np.minimum.at(lowest, cell, oil[other])
+    assert np.all(owner_value <= highest[solver.owner] + 1e-12)
+    assert np.all(owner_value >= lowest[solver.owner] - 1e-12)
+    assert np.all(neighbor_value <= highest[solver.neighbor] + 1e-12)
+    assert np.all(neighbor_value >= lowest[solver.neighbor] - 1e-12)
+
+
+def test_muscl_keeps_the_peak_sharper(bay_arrays):
+    t_end = 3.0
+    limit = stable_delta_t(bay_arrays)
+    upwind_steps = int(np.ceil(t_end / limit))
+    muscl_steps = int(np.ceil(t_end / (MUSCL_CFL * limit)))
+    upwind = UpwindSolver(bay_arrays, t_end / upwind_steps)
+    muscl = MusclSolver(bay_arrays, t_end / muscl_steps)
+
+    upwind_oil = upwind.advance(upwind.initial_oil, upwind_steps)
+    muscl_oil = muscl.advance(muscl.initial_oil, muscl_steps)
+
+    triangles = bay_arrays.is_triangle
+    assert muscl_oil[triangles].max() > upwind_oil[triangles].max()
+    assert muscl_oil.min() > -1e-12
+    # Both schemes move the same oil across the boundary of the same mesh
+    areas = bay_arrays.areas
+    assert np.isclose(np.sum(areas * muscl_oil), np.sum(areas * upwind_oil), rtol=1e-6)
+
+
+def test_muscl_scheme_selects_muscl_backend():
+    mesh = Mesh(meshio.read("simple.msh"))
+    mesh.compute_arrays()
+    backend = create_backend("numpy", mesh, scheme="muscl")
+    assert isinstance(backend, backends.MusclBackend)
+
+    state = mesh.state
+    expected = MusclSolver(mesh.arrays).step(state.current)
+    backend.update(state)
+    assert np.allclose(state.current, expected)
+
+
+def test_unknown_scheme_raises():
+    mesh = Mesh(meshio.read("simple.msh"))
+    mesh.compute_arrays()
+    with pytest.raises(ValueError):
+        create_backend("numpy", mesh, scheme="weno")
+
+
+def test_muscl_has_no_linear_operator(bay_arrays):
+    solver = MusclSolver(bay_arrays)
+    assert isinstance(solver, FaceSolver) and not isinstance(solver, UpwindSolver)
+    assert not hasattr(solver, "operator")
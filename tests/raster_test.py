@@ -0,0 +1,47 @@
+import numpy as np
+from matplotlib.tri import Triangulation
+
+from src.Simulation.raster import Rasterizer, pixel_cells, pixel_grid
+from src.Simulation.rendering import FramePool
+
+
+def test_pixel_cells_match_triangle_finder(bay_arrays):
+    points, triangles = bay_arrays.points, bay_arrays.triangles
+    cells = pixel_cells(points, triangles, 200)
+
+    height, left, top, dx, dy = pixel_grid(points, 200)
+    assert cells.shape == (height, 200)
+    x, y = np.meshgrid(left + (np.arange(200) + 0.5) * dx, top - (np.arange(height) + 0.5) * dy)
+    expected = Triangulation(points[:, 0], points[:, 1], triangles).get_trifinder()(x, y)
+    expected[expected < 0] = len(triangles)
+    assert np.array_equal(cells, expected)
+
+
+def test_frame_colors_follow_oil(bay_arrays):
+    lut = np.array([[0, 0, 0], [100, 100, 100], [200, 200, 200], [250, 0, 0]], dtype=np.uint8)
+    rasterizer = Rasterizer(bay_arrays.points, bay_arrays.triangles, 120, color_limits=(0.0, 1.0), lut=lut)
+    # Oil below, inside and above the color scale
+    oil = np.linspace(-0.5, 1.5, len(bay_arrays.triangles))
+    rgb = rasterizer.rgb(oil)
+
+    assert rgb.shape == (*rasterizer.shape, 3) and rgb.dtype == np.uint8
+    inside = rasterizer.cells < len(oil)
+    levels = np.clip(oil * 4, 0, 3).astype(int)
+    assert np.array_equal(rgb[inside], lut[levels[rasterizer.cells[inside]]])
+    assert np.all(rgb[~inside] == 255)
+
+
+def test_pool_writes_raster_frames(tmp_path, bay_arrays):
+    oil = bay_arrays.initial_oil[bay_arrays.triangle_cells]
+    with FramePool(bay_arrays.points, bay_arrays.triangles, 1, color_limits=(0.0, oil.max()),
+                   raster_width=160) as frames:
+        frames.submit(oil, 0, str(tmp_path / "step_0000.png"), str(tmp_path / "simulation.mp4"))
+    assert (tmp_path / "step_0000.png").exists()
+    assert (tmp_path / "simulation.mp4").stat().st_size > 0
+
+
+def test_equal_color_limits(bay_arrays):
+    lut = np.array([[0, 0, 0], [200, 200, 200]], dtype=np.uint8)
+    rasterizer = Rasterizer(bay_arrays.points, bay_arrays.triangles, 60, color_limits=(0.0, 0.0), lut=lut)
+    rgb = rasterizer.rgb(np.zeros(len(bay_arrays.triangles)))
+    assert np.all(rgb[rasterizer.cells < len(bay_arrays.triangles)] == 0)
@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.Simulation.rendering import FramePool, FrameRenderer, VideoSink
+
+
+@pytest.fixture(scope="module")
+def simple_mesh(simple_arrays):
+    return simple_arrays.points, simple_arrays.triangles, simple_arrays.initial_oil[simple_arrays.triangle_cells]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_frames_are_written(tmp_path, simple_mesh, workers):
+    points, triangles, oil = simple_mesh
+    with FramePool(points, triangles, workers, max_pending=1) as frames:
+        for step in range(3):
+            frames.submit(oil * (step + 1), step, str(tmp_path / f"step_{step:04d}.png"))
+    assert sorted(path.name for path in tmp_path.iterdir()) == [f"step_{step:04d}.png" for step in range(3)]
+
+
+def test_rendering_error_is_raised_on_close(tmp_path, simple_mesh):
+    points, triangles, oil = simple_mesh
+    frames = FramePool(points, triangles, 1)
+    frames.submit(oil, 0, str(tmp_path / "missing" / "step_0000.png"))
+    with pytest.raises(RuntimeError):
+        frames.close()
+
+
+def test_frame_uses_copy_of_oil(tmp_path, simple_mesh):
+    points, triangles, oil = simple_mesh
+    with FramePool(points, triangles, 0) as frames:
+        frames.submit(oil, 0, str(tmp_path / "expected.png"))
+
+    buffer = oil.copy()
+    frames = FramePool(points, triangles, 1)
+    frames.submit(buffer, 0, str(tmp_path / "step_0000.png"))
+    # The solver may overwrite its buffer right after handing the frame over
+    buffer[:] = 0
+    frames.close()
+    assert (tmp_path / "step_0000.png").read_bytes() == (tmp_path / "expected.png").read_bytes()
+
+
+def test_renderer_reuses_figure_with_fixed_color_scale(tmp_path, simple_mesh):
+    points, triangles, oil = simple_mesh
+    renderer = FrameRenderer(points, triangles, (0.0, 2.0))
+    renderer.save(oil, 0, str(tmp_path / "first.png"))
+    renderer.save(oil / 2, 1, str(tmp_path / "second.png"))
+    renderer.save(oil, 0, str(tmp_path / "again.png"))
+
+    # Nothing of the earlier frames is left in the figure
+    assert (tmp_path / "again.png").read_bytes() == (tmp_path / "first.png").read_bytes()
+    assert (tmp_path / "second.png").read_bytes() != (tmp_path / "first.png").read_bytes()
+    assert renderer._collection.get_clim() == (0.0, 2.0)
+
+
+def read_video(path):
+    capture = cv2.VideoCapture(str(path))
+    frames = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame[:, :, ::-1].astype(float))
+    capture.release()
+    return frames
+
+
+def test_video_sink_encodes_rgb_frames(tmp_path):
+    sink = VideoSink(str(tmp_path / "video.mp4"))
+    # Red, green and blue frames
+    for channel in range(3):
+        rgb = np.zeros((64, 80, 3), dtype=np.uint8)
+        rgb[:, :, channel] = 255
+        sink.write(rgb)
+    sink.close()
+
+    frames = read_video(tmp_path / "video.mp4")
+    assert len(frames) == sink.frames == 3
+    assert frames[0].shape == (64, 80, 3)
+    assert [int(np.argmax(frame.mean(axis=(0, 1)))) for frame in frames] == [0, 1, 2]
+
+
+def test_pool_streams_frames_to_video_in_order(tmp_path, simple_mesh):
+    points, triangles, oil = simple_mesh
+    scales = [1.0, 0.2, 0.6, 0.4]
+    renderer = FrameRenderer(points, triangles, (0.0, oil.max()))
+    expected = [renderer.rgb(oil * scale, step) for step, scale in enumerate(scales)]
+
+    video = str(tmp_path / "simulation.mp4")
+    with FramePool(points, triangles, 2, color_limits=(0.0, oil.max())) as frames:
+        for step, scale in enumerate(scales):
+            frames.submit(oil * scale, step, video=video)
+
+    # Only the video is written, every decoded frame is closest to the frame submitted at its position
+    assert [path.name for path in tmp_path.iterdir()] == ["simulation.mp4"]
+    decoded = read_video(video)
+    assert len(decoded) == len(scales)
+    for position, frame in enumerate(decoded):
+        errors = [np.abs(frame - rgb).mean() for rgb in expected]
+        assert np.argmin(errors) == position
@@ -0,0 +1,40 @@
+import meshio
+import numpy as np
+import pytest
+
+from src.Simulation.mesh import Mesh
+from src.Simulation.reorder import morton_order, reorder_mesh
+from src.Simulation.solver import UpwindSolver
+
+
+def run_triangles(msh, n_steps=5):
+    arrays = Mesh(msh).compute_arrays()
+    oil = UpwindSolver(arrays, 0.01).advance(arrays.initial_oil, n_steps)
+    return oil[arrays.triangle_cells]
+
+
+@pytest.mark.parametrize("method", ["rcm", "morton"])
+def test_reordered_results_map_back(method):
+    msh = meshio.read("bay.msh")
+    reordered, reordering = reorder_mesh(msh, method)
+
+    assert sorted(reordering.triangle_order.tolist()) == list(range(len(msh.cells_dict["triangle"])))
+    assert np.allclose(reordering.to_original(run_triangles(reordered)), run_triangles(msh))
+
+
+def test_reordered_triangles_are_the_same_triangles():
+    msh = meshio.read("simple.msh")
+    reordered, reordering = reorder_mesh(msh, "rcm")
+    old = msh.points[msh.cells_dict["triangle"][reordering.triangle_order]]
+    new = reordered.points[reordered.cells_dict["triangle"]]
+    assert np.array_equal(old, new)
+
+
+def test_morton_order_follows_z_curve():
+    centroids = np.array([[1.0, 1.0], [0.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+    assert morton_order(centroids).tolist() == [1, 2, 3, 0]
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        reorder_mesh(meshio.read("simple.msh"), "hilbert")
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pytest
+import toml
+
+import maintest
+from src.Simulation.snapshots import SnapshotReader, SnapshotWriter
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "snapshots.npy")
+
+
+def test_reader_returns_appended_rows(path):
+    rows = np.random.default_rng(0).random((3, 50))
+    with SnapshotWriter(path, 5, (50,), queue_size=1) as writer:
+        for i, row in enumerate(rows):
+            writer.append(row, 10 * i, 0.1 * i)
+        # The writer keeps a copy, changing the array afterwards does not change the snapshot
+        rows_before = rows.copy()
+        rows[:] = 0
+
+    reader = SnapshotReader(path)
+    assert len(reader) == 3
+    assert reader.shape == (50,)
+    assert np.array_equal(reader.steps, [0, 10, 20])
+    assert np.allclose(reader.times, [0.0, 0.1, 0.2])
+    assert np.array_equal(reader[1], rows_before[1])
+    assert np.array_equal(reader[-1], rows_before[2])
+    assert np.array_equal(reader.at_step(20), rows_before[2])
+    with pytest.raises(IndexError):
+        reader[3]
+    with pytest.raises(KeyError):
+        reader.at_step(30)
+
+
+def test_full_writer_raises(path):
+    with SnapshotWriter(path, 1, (4,)) as writer:
+        writer.append(np.zeros(4), 0, 0.0)
+        with pytest.raises(ValueError):
+            writer.append(np.zeros(4), 1, 0.1)
+
+
+def test_writer_thread_error_is_raised(path):
+    writer = SnapshotWriter(path, 2, (4,))
+    writer.append(np.zeros(5), 0, 0.0)  # Wrong shape, fails in the writer thread
+    with pytest.raises(RuntimeError):
+        writer.close()
+
+
+def test_run_stores_every_output_step(tmp_path, write_config):
+    os.makedirs(tmp_path / "plots")
+    config = write_config(tmp_path / "run.toml", 5, 0.25)
+    maintest.run_simulation(config, str(tmp_path), render=False)
+
+    results = toml.load(tmp_path / "simulation_results.toml")
+    reader = SnapshotReader(results["snapshot_file"])
+    assert np.array_equal(reader.steps, [0, 2, 4, 5])
+    assert np.allclose(reader.times, [0.0, 0.1, 0.2, 0.25])
+    assert np.allclose(reader[-1], results["final_oil_amounts"])
+    assert not np.allclose(reader[0], reader[-1])
+
+
+def test_writer_keeps_rows_before_restart(path):
+    with SnapshotWriter(path, 3, (4,)) as writer:
+        for step in range(3):
+            writer.append(np.full(4, step), step, 0.1 * step)
+    # Restart at step 1, its row is written again by the resumed run
+    with SnapshotWriter(path, 2, (4,), keep_before=0.1) as writer:
+        assert writer.count == 1
+        writer.append(np.full(4, 10), 1, 0.1)
+        writer.append(np.full(4, 20), 2, 0.2)
+
+    reader = SnapshotReader(path)
+    assert np.array_equal(reader.steps, [0, 1, 2])
+    assert np.array_equal(reader[0], np.zeros(4))
+    assert np.array_equal(reader[2], np.full(4, 20))
+    assert sorted(os.listdir(os.path.dirname(path))) == ["snapshots.npy", "snapshots_index.npy"]
+
+
+def test_resumed_run_extends_snapshots(tmp_path, write_config):
+    os.makedirs(tmp_path / "plots")
+
+    def run(n_steps, restart):
+        io = {"restartFile": str(tmp_path / "checkpoint.npz")} if restart else {}
+        config = write_config(tmp_path / "run.toml", n_steps, 0.05 * n_steps, io=io)
+        maintest.run_simulation(config, str(tmp_path), render=False)
+
+    run(4, restart=False)
+    first = SnapshotReader(str(tmp_path / "snapshots.npy"))
+    assert np.array_equal(first.steps, [0, 2, 4])
+    first_rows = [first[row] for row in range(len(first))]
+    del first
+
+    # Continue the same run to step 8 from its checkpoint at step 4
+    run(8, restart=True)
+    reader = SnapshotReader(str(tmp_path / "snapshots.npy"))
+    assert np.array_equal(reader.steps, [0, 2, 4, 6, 8])
+    assert np.allclose(reader.times, [0.0, 0.1, 0.2, 0.3, 0.4])
+    for row, oil in enumerate(first_rows):
+        assert np.allclose(reader[row], oil)
@@ -0,0 +1,51 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only needed for rendering or optional backends
+HEAVY_MODULES = ["cv2", "matplotlib", "numba", "meshio"]
+
+# Generous limit for `maintest.py --help`, loading the rendering stack took about 1.5 s here
+STARTUP_BUDGET = 3.0
+
+
+def run_python(*args, cwd=ROOT):
+    return subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True, text=True, check=True,
+                          env={**os.environ, "PYTHONPATH": ROOT})
+
+
+def loaded_modules_after(code, cwd=ROOT):
+    result = run_python("-c", f"import sys\n{code}\nprint(sorted(m for m in {HEAVY_MODULES} if m in sys.modules))",
+                        cwd=cwd)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_import_does_not_load_rendering():
+    assert loaded_modules_after("import maintest") == "[]"
+
+
+def test_cli_startup_time(record_property):
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        run_python("maintest.py", "--help")
+        times.append(time.perf_counter() - start)
+    startup = statistics.median(times)
+    record_property("cli_startup_seconds", startup)
+    print(f"maintest.py --help: {startup:.2f} s")
+    assert startup < STARTUP_BUDGET
+
+
+def test_no_render_run(tmp_path, write_config):
+    write_config(tmp_path / "quick.toml", mesh_name="bay.msh")
+    code = f"import maintest\nsys.argv = ['maintest.py', '-c', 'quick.toml', '-f', '.', '--no-render']\nmaintest.main()"
+    assert loaded_modules_after(code, cwd=tmp_path) == "[]"
+
+    results = tmp_path / "results" / "quick"
+    assert (results / "simulation_results.toml").exists()
+    assert os.listdir(results / "plots") == []
+    assert not (results / "simulation.mp4").exists()
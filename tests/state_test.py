@@ -0,0 +1,57 @@
+import meshio
+import numpy as np
+import pytest
+
+from src.Simulation.cells import Triangle
+from src.Simulation.mesh import Mesh
+from src.Simulation.solver import UpwindSolver
+from src.Simulation.state import OilState
+
+
+@pytest.fixture
+def simple_mesh():
+    mesh = Mesh(meshio.read("simple.msh"))
+    mesh.main_function()
+    return mesh
+
+
+def test_swap_exchanges_buffers():
+    state = OilState([1.0, 2.0])
+    state.next[:] = [3.0, 4.0]
+    state.swap()
+    assert state.current.tolist() == [3.0, 4.0]
+    assert state.next.tolist() == [1.0, 2.0]
+
+
+def test_cells_read_shared_state(simple_mesh):
+    triangle = next(cell for cell in simple_mesh._cells if isinstance(cell, Triangle))
+    simple_mesh.state.current[triangle.id - 1] = 0.5
+    assert triangle.oil_amount == 0.5
+
+
+def test_update_order_does_not_matter(simple_mesh):
+    triangles = [cell for cell in simple_mesh._cells if isinstance(cell, Triangle)]
+    initial = simple_mesh.state.current.copy()
+
+    for cell in triangles:
+        cell.update_oil_amount()
+    forward = simple_mesh.state.next.copy()
+
+    for cell in reversed(triangles):
+        cell.update_oil_amount()
+    assert np.array_equal(simple_mesh.state.current, initial)
+    assert np.array_equal(simple_mesh.state.next, forward)
+
+
+def test_cells_match_solver_over_several_steps(simple_mesh):
+    solver = UpwindSolver(simple_mesh.arrays)
+    oil = solver.initial_oil
+    triangles = [cell for cell in simple_mesh._cells if isinstance(cell, Triangle)]
+
+    for _ in range(5):
+        for cell in triangles:
+            cell.update_oil_amount()
+        simple_mesh.state.swap()
+        oil = solver.step(oil)
+
+    assert np.allclose(simple_mesh.state.current, oil)
@@ -0,0 +1,98 @@
+import meshio
+import numpy as np
+import pytest
+
+from src.Simulation.cells import Triangle
+from src.Simulation.mesh import Mesh
+from src.Simulation.solver import UpwindSolver, plan_time_steps, report_time_steps, stable_delta_t
+
+
+@pytest.fixture(scope="module")
+def simple_mesh():
+    mesh = Mesh(meshio.read("simple.msh"))
+    mesh.main_function()
+    return mesh
+
+
+def test_normals_point_outward(simple_mesh):
+    points = simple_mesh._mesh.points[:, :2]
+    for cell in simple_mesh._cells:
+        if isinstance(cell, Triangle):
+            corners = sorted({int(v) for face, _ in cell._normal_vectors_with_faces for v in face})
+            center = points[corners].mean(axis=0)
+            for face, normal in cell._normal_vectors_with_faces:
+                face_midpoint = points[list(face)].mean(axis=0)
+                assert np.dot(normal, face_midpoint - center) > 0
+
+
+def test_faces_stored_once(simple_mesh):
+    solver = UpwindSolver(simple_mesh.arrays)
+    pairs = set(zip(solver.owner.tolist(), solver.neighbor.tolist()))
+    assert len(pairs) == len(solver.owner)
+    assert not any((b, a) in pairs for a, b in pairs)
+
+
+def test_step_matches_triangle_update(simple_mesh):
+    solver = UpwindSolver(simple_mesh.arrays)
+    oil = solver.step(solver.initial_oil)
+
+    for cell in simple_mesh._cells:
+        if isinstance(cell, Triangle):
+            assert np.isclose(oil[cell.id - 1], cell.update_oil_amount())
+
+
+def test_sparse_step_matches_face_step(simple_mesh):
+    solver = UpwindSolver(simple_mesh.arrays)
+    sparse_solver = UpwindSolver(simple_mesh.arrays, sparse=True)
+    oil = solver.initial_oil
+
+    assert np.allclose(sparse_solver.step(oil), solver.step(oil))
+
+
+def test_advance_batches_steps(simple_mesh):
+    solver = UpwindSolver(simple_mesh.arrays)
+    oil = solver.initial_oil
+    expected = oil
+    for _ in range(5):
+        expected = solver.step(expected)
+
+    assert solver.operator.format == "csr"
+    assert np.allclose(solver.advance(oil, 5), expected)
+
+
+def test_face_table_resolves_every_face(simple_mesh):
+    for cell in simple_mesh._cells:
+        if isinstance(cell, Triangle):
+            assert len(cell.face_table) == 3
+            for neighbor_id, normal, coefficient in cell.face_table:
+                neighbor = simple_mesh._cells[neighbor_id - 1]
+                v_avg = 0.5 * (cell.velocity_field + neighbor._velocity_field)
+                assert coefficient == pytest.approx(np.dot(v_avg, normal))
+
+
+def test_stable_delta_t_keeps_oil_positive(simple_mesh):
+    max_delta_t = stable_delta_t(simple_mesh.arrays)
+    oil = UpwindSolver(simple_mesh.arrays, max_delta_t).advance(simple_mesh.arrays.initial_oil, 20)
+    assert oil.min() >= -1e-12
+
+    unstable = UpwindSolver(simple_mesh.arrays, 3 * max_delta_t).advance(simple_mesh.arrays.initial_oil, 20)
+    assert unstable.min() < 0
+
+
+def test_plan_time_steps():
+    # Unstable: every configured step is split
+    assert plan_time_steps(0.1, 0.03, 10, 5) == (1, 4)
+    # Over-resolved: merge as many steps as fit, dividing nSteps and writeFrequency
+    assert plan_time_steps(0.0002, 0.25, 500, 10) == (10, 1)
+    assert plan_time_steps(0.01, 0.035, 500, 10) == (2, 1)
+    assert plan_time_steps(0.01, 0.05, 7, 10) == (1, 1)
+    # After a restart at step 5 of 20 only single steps reach the end time
+    assert plan_time_steps(0.05, 0.249, 20, 10) == (2, 1)
+    assert plan_time_steps(0.05, 0.249, 20, 10, start_step=5) == (1, 1)
+
+
+def test_report_counts_steps_left_after_restart(capsys):
+    report_time_steps(500, 0.0002, 0.25, 10, 1)
+    assert "Taking 50 steps instead" in capsys.readouterr().out
+    report_time_steps(500, 0.0002, 0.25, 10, 1, start_step=200)
+    assert "Taking 30 steps instead" in capsys.readouterr().out